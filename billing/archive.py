@@ -0,0 +1,241 @@
+"""
+Restaurant Billing Archive
+Moves closed months of orders into per-month SQLite files and reads them back.
+
+The live restaurant_billing.db only needs the current month or two for the
+tills; older months make VACUUM, backups and the page cache worse for no gain.
+archive_month("2024-03") copies that month's orders and order_items (plus a
+snapshot of menu) into archive/restaurant_billing_2024-03.db - same tables and
+indexes as the live database - deletes them from the live file and records the
+partition in archive_partitions.
+
+Readers do not need to know: iter_sources() yields "main" and then ATTACHes
+each partition overlapping the requested business-day range in turn, so report
+code runs the same query against every schema and merges the results. The
+rollups and item counters stay in the live database and keep covering the
+archived months (their rebuilds and business_day.py --restamp read and update
+the partitions too).
+Usage:
+    python archive.py 2024-03 [--dir archive] [--vacuum]
+    python archive.py --list
+"""
+import argparse
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+from business_day import CUTOFF_HOUR, restamp
+from db import BUSY_TIMEOUT_MS, DB_PATH, get_pool, reader, register_migration, table_exists
+
+ARCHIVE_DIR = "archive"
+ARCHIVED_TABLES = ("menu", "orders", "order_items")
+
+CATALOG_SQL = """
+CREATE TABLE IF NOT EXISTS archive_partitions (
+    month TEXT PRIMARY KEY,                -- 'YYYY-MM'
+    path TEXT NOT NULL,
+    first_day TEXT NOT NULL,               -- business-day range held by the partition
+    last_day TEXT NOT NULL,
+    first_id INTEGER,                      -- order id range held by the partition
+    last_id INTEGER,
+    orders INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    archived_at TEXT NOT NULL
+)
+"""
+
+
+@register_migration
+def create_catalog(con):
+    con.execute(CATALOG_SQL)
+
+
+def _month_bounds(month):
+    first = date.fromisoformat(f"{month}-01")
+    following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first.isoformat(), following.isoformat()
+
+
+def _partition_ddl(con):
+    """CREATE statements for the archived tables and their indexes, as they are in the live DB."""
+    marks = ",".join("?" * len(ARCHIVED_TABLES))
+    return [sql for (sql,) in con.execute(f"""
+        SELECT sql FROM sqlite_master
+        WHERE tbl_name IN ({marks}) AND type IN ('table', 'index') AND sql IS NOT NULL
+        ORDER BY type = 'index'
+    """, ARCHIVED_TABLES)]
+
+
+def archive_month(month, archive_dir=ARCHIVE_DIR, db_path=DB_PATH):
+    """
+    Move one closed month ('YYYY-MM', by business day) into its partition file.
+    Returns (orders, lines) moved.
+    """
+    first_day, next_day = _month_bounds(month)
+    if next_day > date.today().isoformat():
+        raise ValueError(f"{month} is not closed yet")
+
+    get_pool(db_path)  # run the migrations (orders.business_day, the catalog) before the raw connection
+    live = Path(db_path).resolve()
+    target = (Path(archive_dir) if Path(archive_dir).is_absolute() else live.parent / archive_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    path = (target / f"{live.stem}_{month}.db").resolve()
+
+    # ATTACH cannot run inside a transaction, so this job uses its own connection
+    # rather than the pool's writer.
+    con = sqlite3.connect(live, isolation_level=None)
+    try:
+        con.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        (pending,) = con.execute("SELECT COUNT(*) FROM orders WHERE business_day >= ? AND business_day < ?",
+                                 (first_day, next_day)).fetchone()
+        if not pending:
+            return 0, 0
+        if not path.exists():
+            part = sqlite3.connect(path)
+            try:
+                for sql in _partition_ddl(con):
+                    part.execute(sql)
+                part.commit()
+            finally:
+                part.close()
+
+        con.execute("ATTACH DATABASE ? AS part", (str(path),))
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute("INSERT OR REPLACE INTO part.menu SELECT * FROM main.menu")
+            moved_orders = con.execute("""
+                INSERT INTO part.orders SELECT * FROM main.orders
+                WHERE business_day >= ? AND business_day < ?
+            """, (first_day, next_day)).rowcount
+            moved_lines = con.execute("""
+                INSERT INTO part.order_items SELECT * FROM main.order_items
+                WHERE order_id IN (SELECT id FROM main.orders WHERE business_day >= ? AND business_day < ?)
+            """, (first_day, next_day)).rowcount
+            con.execute("""
+                DELETE FROM main.order_items
+                WHERE order_id IN (SELECT id FROM main.orders WHERE business_day >= ? AND business_day < ?)
+            """, (first_day, next_day))
+            con.execute("DELETE FROM main.orders WHERE business_day >= ? AND business_day < ?",
+                        (first_day, next_day))
+
+            first_id, last_id, orders, lines = con.execute("""
+                SELECT MIN(id), MAX(id), COUNT(*), (SELECT COUNT(*) FROM part.order_items)
+                FROM part.orders
+            """).fetchone()
+            con.execute("""
+                INSERT OR REPLACE INTO main.archive_partitions
+                (month, path, first_day, last_day, first_id, last_id, orders, lines, archived_at)
+                VALUES (?, ?, ?, date(?, '-1 day'), ?, ?, ?, ?, ?)
+            """, (month, str(path), first_day, next_day, first_id, last_id, orders, lines,
+                  datetime.now().isoformat(timespec="seconds")))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("DETACH DATABASE part")
+    finally:
+        con.close()
+    return moved_orders, moved_lines
+
+
+# ----------------- Reading across partitions -----------------
+def overlapping_partitions(con, start=None, end=None):
+    """Partition paths whose business days overlap [start, end] (None = open)."""
+    if not table_exists(con, "archive_partitions"):
+        return []
+    return [path for (path,) in con.execute("""
+        SELECT path FROM archive_partitions
+        WHERE (?1 IS NULL OR last_day >= ?1) AND (?2 IS NULL OR first_day <= ?2)
+        ORDER BY month
+    """, (None if start is None else str(start), None if end is None else str(end)))]
+
+
+def partitions_for_ids(con, order_ids):
+    """Partition paths whose order id range contains any of order_ids."""
+    if not order_ids or not table_exists(con, "archive_partitions"):
+        return []
+    low, high = min(order_ids), max(order_ids)
+    return [path for path, first_id, last_id in con.execute(
+        "SELECT path, first_id, last_id FROM archive_partitions WHERE last_id >= ? AND first_id <= ? ORDER BY month",
+        (low, high)) if any(first_id <= i <= last_id for i in order_ids)]
+
+
+@contextmanager
+def attached(con, path, alias="part"):
+    """ATTACH a partition read-only for the duration of the block."""
+    con.execute(f"ATTACH DATABASE ? AS {alias}", (Path(path).as_uri() + "?mode=ro",))
+    try:
+        yield alias
+    finally:
+        con.execute(f"DETACH DATABASE {alias}")
+
+
+def iter_partitions(con, paths):
+    """Attach each partition in turn and yield its schema name."""
+    for path in paths:
+        with attached(con, path) as schema:
+            yield schema
+
+
+def iter_sources(con, start=None, end=None):
+    """
+    Yield the schema names to run a report against: "main", then each partition
+    overlapping [start, end], attached one at a time (SQLite caps attachments at 10).
+    con must have been opened with uri=True (the pool's readers are).
+    """
+    yield "main"
+    yield from iter_partitions(con, overlapping_partitions(con, start, end))
+
+
+def partition_rows(con, sql, params=()):
+    """
+    Rows of sql run against every partition, each on its own read-only connection.
+    Unlike iter_sources() this works inside a write transaction (no ATTACH), so
+    the rollup and counter rebuilds can include the archived months.
+    """
+    for path in overlapping_partitions(con):
+        part = sqlite3.connect(Path(path).as_uri() + "?mode=ro", uri=True)
+        try:
+            yield from part.execute(sql, params)
+        finally:
+            part.close()
+
+
+def restamp_partitions(con, cutoff_hour=CUTOFF_HOUR):
+    """business_day.restamp() every partition and update its day range in the catalog."""
+    for path in overlapping_partitions(con):
+        part = sqlite3.connect(path)
+        try:
+            with part:
+                restamp(part, cutoff_hour)
+                first_day, last_day = part.execute("SELECT MIN(business_day), MAX(business_day) FROM orders").fetchone()
+        finally:
+            part.close()
+        if first_day is not None:
+            con.execute("UPDATE archive_partitions SET first_day = ?, last_day = ? WHERE path = ?",
+                        (first_day, last_day, path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive closed months into per-month databases.")
+    parser.add_argument("month", nargs="?", help="month to archive, YYYY-MM")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--dir", default=ARCHIVE_DIR, help="partition directory (relative to the database)")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the live database afterwards")
+    parser.add_argument("--list", action="store_true", help="show the partition catalog")
+    args = parser.parse_args()
+
+    if args.list:
+        with reader(args.db) as con:
+            for row in con.execute("SELECT month, orders, lines, path FROM archive_partitions ORDER BY month"):
+                print(*row, sep="\t")
+    elif args.month:
+        orders, lines = archive_month(args.month, args.dir, args.db)
+        print(f"✔ Archived {orders} orders / {lines} lines of {args.month}")
+        if args.vacuum:
+            con = sqlite3.connect(args.db, isolation_level=None)
+            con.execute("VACUUM")
+            con.close()
+    else:
+        parser.print_help()
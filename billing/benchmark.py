@@ -0,0 +1,269 @@
+"""
+Restaurant Billing Benchmarks
+Repeatable latency/throughput benchmarks of the app's hot paths, with a baseline check.
+
+Runs against a copy of a synthetic database (synthetic_data.py, generated once
+and reused for the same size and seed), so write benchmarks never touch the
+source and every run starts from the same data. Each benchmark times one
+operation per iteration after a short warm-up:
+    save_order              one cashier, orders.save_order
+    save_order_concurrent   THREADS cashiers at once through the group-commit writer
+    upload_menu             menu_sync.sync_menu with ~10% of prices changed
+    get_menu                menu_cache.get_menu
+    sales_summary           reports.sales_summary over the last 30 business days
+    most_sold_items         reports.top_items over the last 30 business days
+    get_order_details       order_details.get_order_details of random order ids
+    generate_pdf            receipts.render_receipt of a fetched order
+
+Results are JSON (mean/p50/p90/p95/p99/max in ms, ops/s per benchmark). Given
+--baseline, any benchmark whose p50 or p95 is more than --tolerance slower than
+the baseline is reported and the exit status is 1, so it can gate a rollout.
+Usage:
+    python benchmark.py --orders 1000000 -o results.json
+    python benchmark.py --baseline baseline.json [--tolerance 0.25]
+    python benchmark.py --save-baseline baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import menu_cache
+import order_details
+import order_writer
+import orders
+import receipts
+import reports
+from business_day import last_n_days
+from db import close_all
+from menu_sync import sync_menu
+from synthetic_data import SEED, create_database
+
+THREADS = 8
+WARMUP = 5
+TOLERANCE = 0.25
+PERCENTILES = (50, 90, 95, 99)
+
+# db_path: the working copy; menu: active menu DataFrame; max_order_id: highest order id
+Context = namedtuple("Context", "db_path menu max_order_id rng")
+# setup(ctx) -> op(); op() is timed once per iteration
+Benchmark = namedtuple("Benchmark", "setup iterations threads")
+
+BENCHMARKS = {}
+
+
+def benchmark(name, iterations, threads=1):
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(setup, iterations, threads)
+        return setup
+    return register
+
+
+def _carts(ctx, n=50):
+    carts = []
+    for _ in range(n):
+        cart = ctx.menu.sample(ctx.rng.randint(1, 4), random_state=ctx.rng.randrange(2 ** 32)).copy()
+        cart["qty"] = [ctx.rng.randint(1, 3) for _ in range(len(cart))]
+        carts.append(cart)
+    return carts
+
+
+@benchmark("save_order", 500)
+def _save_order(ctx):
+    carts = _carts(ctx)
+    return lambda: orders.save_order("DINE_IN", "UPI", ctx.rng.choice(carts), db_path=ctx.db_path)
+
+
+@benchmark("save_order_concurrent", 100, threads=THREADS)
+def _save_order_concurrent(ctx):
+    carts = _carts(ctx)
+    return lambda: order_writer.save_order("TAKEAWAY", "CASH", ctx.rng.choice(carts), db_path=ctx.db_path)
+
+
+@benchmark("upload_menu", 20)
+def _upload_menu(ctx):
+    original = ctx.menu[["item_name", "category", "price", "gst_rate"]].copy()
+    changed = original.copy()
+    changed.loc[changed.index[::10], "price"] += 5
+    uploads = [changed, original]
+
+    def op():
+        uploads.reverse()
+        sync_menu(uploads[0], db_path=ctx.db_path)
+    return op
+
+
+@benchmark("get_menu", 2000)
+def _get_menu(ctx):
+    return lambda: menu_cache.get_menu(ctx.db_path)
+
+
+@benchmark("sales_summary", 200)
+def _sales_summary(ctx):
+    start, end = last_n_days(30)
+    return lambda: reports.sales_summary(start, end, ctx.db_path)
+
+
+@benchmark("most_sold_items", 200)
+def _most_sold_items(ctx):
+    start, end = last_n_days(30)
+    return lambda: reports.top_items(start, end, None, 10, ctx.db_path)
+
+
+@benchmark("get_order_details", 1000)
+def _get_order_details(ctx):
+    return lambda: order_details.get_order_details(ctx.rng.randint(1, ctx.max_order_id), ctx.db_path)
+
+
+@benchmark("generate_pdf", 200)
+def _generate_pdf(ctx):
+    ids = [ctx.rng.randint(1, ctx.max_order_id) for _ in range(50)]
+    bills = [(d.order, [receipts.receipt_row(item) for item in d.items])
+             for d in order_details.get_orders_details(ids, ctx.db_path).values()]
+    return lambda: receipts.render_receipt(*ctx.rng.choice(bills))
+
+
+# ----------------- Running -----------------
+def _time(op, iterations):
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def summarize(latencies, wall_seconds):
+    ms = sorted(1000 * t for t in latencies)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive")
+    result = {"iterations": len(ms), "mean_ms": round(statistics.fmean(ms), 4)}
+    result.update({f"p{p}_ms": round(cuts[p - 1], 4) for p in PERCENTILES})
+    result["max_ms"] = round(ms[-1], 4)
+    result["ops_per_s"] = round(len(ms) / wall_seconds, 1)
+    return result
+
+
+def run_benchmark(bench, ctx, scale=1.0):
+    op = bench.setup(ctx)
+    _time(op, WARMUP)
+    iterations = max(2, int(bench.iterations * scale))
+    if bench.threads == 1:
+        started = time.perf_counter()
+        latencies = _time(op, iterations)
+    else:
+        per_thread = [[] for _ in range(bench.threads)]
+        workers = [threading.Thread(target=lambda out: out.extend(_time(op, iterations)), args=(out,))
+                   for out in per_thread]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        latencies = [t for out in per_thread for t in out]
+    result = summarize(latencies, time.perf_counter() - started)
+    result["threads"] = bench.threads
+    return result
+
+
+def _dataset(n_orders, seed, data_dir):
+    """Path of the synthetic database for this size and seed, generating it on first use."""
+    path = Path(data_dir) / f"bench_{n_orders}_{seed}.db"
+    if not path.exists():
+        print(f"Generating {n_orders} synthetic orders into {path} ...", file=sys.stderr)
+        create_database(path, n_orders=n_orders, seed=seed)
+        close_all()
+    return path
+
+
+def run(source, names=None, scale=1.0, seed=SEED):
+    """Run the named benchmarks (default: all) on a fresh copy of source. Returns the results dict."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        src, dst = sqlite3.connect(source), sqlite3.connect(db_path)
+        try:
+            src.backup(dst)
+            (orders_count, max_order_id) = dst.execute("SELECT COUNT(*), MAX(id) FROM orders").fetchone()
+        finally:
+            src.close()
+            dst.close()
+
+        ctx = Context(db_path, menu_cache.get_menu(db_path), max_order_id, random.Random(seed))
+        try:
+            for name in names or BENCHMARKS:
+                print(f"  {name} ...", file=sys.stderr)
+                results[name] = run_benchmark(BENCHMARKS[name], ctx, scale)
+        finally:
+            order_writer.stop_all()
+            close_all()
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "orders": orders_count,
+            "seed": seed,
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """(lines of a comparison table, names of benchmarks that regressed)."""
+    lines = [f"{'benchmark':<24}{'p50 ms':>10}{'base':>10}{'p95 ms':>10}{'base':>10}  status"]
+    regressed = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            lines.append(f"{name:<24}{result['p50_ms']:>10.3f}{'-':>10}{result['p95_ms']:>10.3f}{'-':>10}  new")
+            continue
+        slower = [p for p in ("p50_ms", "p95_ms") if result[p] > base[p] * (1 + tolerance)]
+        if slower:
+            regressed.append(name)
+        lines.append(f"{name:<24}{result['p50_ms']:>10.3f}{base['p50_ms']:>10.3f}"
+                     f"{result['p95_ms']:>10.3f}{base['p95_ms']:>10.3f}  "
+                     + ("REGRESSED (" + ", ".join(slower) + ")" if slower else "ok"))
+    return lines, regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the billing hot paths.")
+    parser.add_argument("--db", help="existing database to copy (default: a synthetic one)")
+    parser.add_argument("--orders", type=int, default=200_000, help="size of the synthetic database")
+    parser.add_argument("--data-dir", default=".", help="where synthetic databases are kept")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every iteration count")
+    parser.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--save-baseline", help="also write the results as a new baseline")
+    args = parser.parse_args()
+
+    source = args.db or _dataset(args.orders, args.seed, args.data_dir)
+    current = run(source, args.only, args.scale, args.seed)
+    text = json.dumps(current, indent=2)
+    for path in filter(None, (args.output, args.save_baseline)):
+        Path(path).write_text(text + "\n", encoding="utf-8")
+    if not args.output:
+        print(text)
+
+    if args.baseline:
+        lines, regressed = compare(current, json.loads(Path(args.baseline).read_text(encoding="utf-8")),
+                                   args.tolerance)
+        print("\n".join(lines), file=sys.stderr)
+        if regressed:
+            print(f"✖ {len(regressed)} benchmark(s) regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+            sys.exit(1)
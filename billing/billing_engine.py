@@ -0,0 +1,136 @@
+"""
+Restaurant Billing Engine
+The one place bill amounts are computed, in integer paise with NumPy.
+
+Totals used to be worked out with float rupees in save_order, again in each
+order screen and again in v_order_summary, and the three could disagree by a
+paisa. Everything now goes through this module:
+    - prices are converted to paise once (round half away from zero)
+    - GST rates are held in basis points (5% = 500)
+    - line_subtotal = price_paise * qty                         (exact)
+    - line_tax      = line_subtotal * gst_bp / 10000, rounded half away from zero, per line
+    - line_total    = line_subtotal + line_tax
+    - order subtotal / tax are the sums of the lines; total = subtotal + tax - discount
+Every step is a whole-array operation, so a cart, a chunk of thousands of
+orders (batch_totals) or an audit over millions of lines (audit_lines) costs
+one pass. Amounts are stored in the database as rupees = paise / 100.
+Usage:
+    python billing_engine.py --audit    # lines whose stored amounts differ from the engine
+"""
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+from db import DB_PATH
+
+# All amounts in paise (int64 arrays / ints)
+CartTotals = namedtuple("CartTotals", "line_subtotal line_tax line_total subtotal tax discount total")
+BatchTotals = namedtuple("BatchTotals", "line_subtotal line_tax line_total subtotal tax discount total")
+
+
+def _round_div(numerator, denominator):
+    """Integer division rounding half away from zero."""
+    numerator = np.asarray(numerator, dtype=np.int64)
+    magnitude = (np.abs(numerator) + denominator // 2) // denominator
+    return np.where(numerator < 0, -magnitude, magnitude)
+
+
+def _hundredths(values):
+    """values * 100 as int64, rounded half away from zero (np.rint would round half to even)."""
+    scaled = np.asarray(values, dtype=float) * 100
+    # Round off binary noise first, so 1.005 * 100 = 100.49999999999999 counts as the half it is.
+    magnitude = np.floor(np.round(np.abs(scaled), 6) + 0.5)
+    return (np.sign(scaled) * magnitude).astype(np.int64)
+
+
+def to_paise(rupees):
+    return _hundredths(rupees)
+
+
+def to_basis_points(rates):
+    return _hundredths(rates)
+
+
+def to_rupees(paise):
+    """Paise (int or array) back to rupees for display and the REAL columns."""
+    if np.ndim(paise) == 0:
+        return int(paise) / 100
+    return np.asarray(paise, dtype=np.int64) / 100
+
+
+def line_amounts(price, qty, gst_rate):
+    """(line_subtotal, line_tax, line_total) paise arrays from rupee prices, quantities and GST %."""
+    line_subtotal = to_paise(price) * np.asarray(qty, dtype=np.int64)
+    line_tax = _round_div(line_subtotal * to_basis_points(gst_rate), 10000)
+    return line_subtotal, line_tax, line_subtotal + line_tax
+
+
+def cart_totals(items, discount=0.0):
+    """
+    Totals for one cart (anything with 'price', 'qty' and 'gst_rate' columns,
+    e.g. the order screen's DataFrame). discount is in rupees.
+    """
+    line_subtotal, line_tax, line_total = line_amounts(items['price'], items['qty'], items['gst_rate'])
+    subtotal = int(line_subtotal.sum())
+    tax = int(line_tax.sum())
+    discount = int(to_paise(discount or 0))
+    return CartTotals(line_subtotal, line_tax, line_total, subtotal, tax, discount, subtotal + tax - discount)
+
+
+def batch_totals(order_index, price, qty, gst_rate, discount=None, n_orders=None):
+    """
+    Totals for many orders at once. order_index maps each line to its order
+    (0..n_orders-1); discount is an optional per-order rupee array.
+    """
+    order_index = np.asarray(order_index, dtype=np.int64)
+    if n_orders is None:
+        n_orders = int(order_index.max()) + 1 if len(order_index) else 0
+    line_subtotal, line_tax, line_total = line_amounts(price, qty, gst_rate)
+    # bincount sums in float64, exact for integers below 2**53 paise
+    subtotal = np.rint(np.bincount(order_index, line_subtotal, n_orders)).astype(np.int64)
+    tax = np.rint(np.bincount(order_index, line_tax, n_orders)).astype(np.int64)
+    discount = to_paise(discount) if discount is not None else np.zeros(n_orders, dtype=np.int64)
+    return BatchTotals(line_subtotal, line_tax, line_total, subtotal, tax, discount, subtotal + tax - discount)
+
+
+# ----------------- Audit -----------------
+AUDIT_SQL = """
+    SELECT id, unit_price, quantity, gst_rate, line_subtotal, line_tax, line_total
+    FROM order_items
+"""
+
+
+def audit_lines(db_path=DB_PATH, chunk_size=100000):
+    """
+    Recompute every stored line with the engine, one chunk of rows per pass.
+    Yields (order_items.id, stored line_total, engine line_total) for lines that
+    are off by a paisa or more.
+    """
+    from exports import iter_query
+
+    chunks = iter_query(AUDIT_SQL, (), chunk_size, db_path)
+    next(chunks)  # column names
+    for rows in chunks:
+        ids, price, qty, gst_rate, stored_sub, stored_tax, stored_total = (np.array(col) for col in zip(*rows))
+        line_subtotal, line_tax, line_total = line_amounts(price, qty, gst_rate)
+        bad = ((to_paise(stored_sub) != line_subtotal) | (to_paise(stored_tax) != line_tax)
+               | (to_paise(stored_total) != line_total))
+        for i in np.flatnonzero(bad):
+            yield int(ids[i]), float(stored_total[i]), to_rupees(line_total[i])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit stored bill amounts against the billing engine.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--audit", action="store_true", help="list order_items whose amounts differ")
+    args = parser.parse_args()
+
+    if args.audit:
+        mismatches = 0
+        for item_id, stored, expected in audit_lines(args.db):
+            mismatches += 1
+            print(f"order_items.id={item_id}: stored {stored:.2f}, engine {expected:.2f}")
+        print(f"✔ Audit finished: {mismatches} mismatching lines")
+    else:
+        parser.print_help()
@@ -0,0 +1,159 @@
+"""
+Restaurant Billing Report CLI
+Fast-starting reports for cron jobs: plain sqlite3 cursors and the csv module.
+
+The old CLI path (Example Usage (CLI) over step 6.py) imported pandas just to
+run a few aggregate queries. This command runs the query builders of
+reports.py (no pandas) on a read-only connection - it never creates, migrates
+or locks the database, like outlets.py - and writes CSV to stdout by default.
+Heavier dependencies load only for the options that need them: pandas for
+.xlsx output, pyarrow for .parquet, fpdf for receipt exports.
+    daily | weekly | monthly   sales summaries (rollup tables)
+    top-items                  best sellers (per-item counters)
+    export items               every sold line, streamed (archived months included)
+    export receipts            PDF receipts as a .zip of bills or one .pdf
+Dates are business days; --last N means the last N days including today.
+-o picks the format from the extension: .csv, .jsonl, .parquet, .xlsx, plus .gz.
+Usage:
+    python billing_report.py daily --last 7
+    python billing_report.py monthly --start 2024-04-01 --end 2025-03-31 -o fy25.csv
+    python billing_report.py top-items --last 30 --category Beverages --limit 5
+    python billing_report.py export items --start 2024-04-01 --end 2024-04-30 -o april.csv.gz
+    python billing_report.py export receipts --start 2024-04-01 --end 2024-04-30 -o april.zip
+"""
+import argparse
+import csv
+import sqlite3
+import sys
+from contextlib import closing
+from pathlib import Path
+
+import item_sales
+import reports
+from db import DB_PATH
+
+SUMMARIES = {
+    "daily": reports.daily_sales_query,
+    "weekly": reports.weekly_sales_query,
+    "monthly": reports.monthly_sales_query,
+}
+
+
+def connect(db_path):
+    """Read-only connection to an existing database."""
+    path = Path(db_path)
+    if not path.is_file():
+        raise SystemExit(f"billing-report: no database at {db_path}")
+    return sqlite3.connect(path.resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def _run(con, sql, params):
+    cur = con.execute(sql, params)
+    return tuple(c[0] for c in cur.description), cur.fetchall()
+
+
+def _date_range(args):
+    if args.last:
+        from business_day import last_n_days
+        return last_n_days(args.last)
+    return args.start, args.end
+
+
+def write_output(columns, chunks, output):
+    """Write column names + row chunks to output (None = CSV on stdout). Returns rows written."""
+    if output is None:
+        writer = csv.writer(sys.stdout, lineterminator="\n")
+        writer.writerow(columns)
+        rows = 0
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+        return rows
+
+    path = output[:-3] if output.endswith(".gz") else output
+    fmt = path.rsplit(".", 1)[-1].lower() if "." in path else "csv"
+    if fmt == "xlsx":
+        import pandas as pd
+        frame = pd.DataFrame([row for chunk in chunks for row in chunk], columns=columns)
+        frame.to_excel(output, index=False)
+        return len(frame)
+
+    from exports import export_rows
+    summary = export_rows(columns, chunks, path, format=fmt, gzip=output.endswith(".gz"))
+    print(f"✔ {summary.rows} rows written to {summary.path} (sha256 {summary.sha256})", file=sys.stderr)
+    return summary.rows
+
+
+def run_summary(args):
+    start, end = _date_range(args)
+    with closing(connect(args.db)) as con:
+        columns, rows = _run(con, *SUMMARIES[args.command](start, end))
+    write_output(columns, [rows], args.output)
+
+
+def run_top_items(args):
+    start, end = _date_range(args)
+    with closing(connect(args.db)) as con:
+        columns, rows = _run(con, *item_sales.top_items_query(start, end, args.category, args.limit))
+    write_output(columns, [rows], args.output)
+
+
+def run_export(args):
+    start, end = _date_range(args)
+    if args.what == "items":
+        with closing(connect(args.db)) as con:
+            chunks = reports.item_line_chunks(con, start, end)
+            write_output(next(chunks), chunks, args.output)
+        return
+
+    if not (start and end and args.output):
+        raise SystemExit("export receipts needs a date range (--start/--end or --last) and -o out.zip|out.pdf")
+    connect(args.db).close()    # fail on a missing file before receipts.py opens (and creates) it
+    import receipts
+    ids = receipts.order_ids_between(start, end, args.db)
+    if args.output.lower().endswith(".pdf"):
+        written = receipts.write_receipts_pdf(ids, args.output, args.db)
+    else:
+        written = receipts.write_receipts_zip(ids, args.output, args.processes, args.db)
+    print(f"✔ {written} receipts written to {args.output}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="billing-report", description="Restaurant billing reports.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dates = argparse.ArgumentParser(add_help=False)
+    dates.add_argument("--db", default=DB_PATH)
+    dates.add_argument("--start", help="first business day, YYYY-MM-DD")
+    dates.add_argument("--end", help="last business day, YYYY-MM-DD")
+    dates.add_argument("--last", type=int, metavar="N", help="the last N business days, today included")
+    dates.add_argument("-o", "--output", help="output file (default: CSV on stdout)")
+
+    for name in SUMMARIES:
+        commands.add_parser(name, parents=[dates], help=f"{name} sales").set_defaults(run=run_summary)
+
+    top = commands.add_parser("top-items", parents=[dates], help="best selling items")
+    top.add_argument("--category")
+    top.add_argument("--limit", type=int, default=10)
+    top.set_defaults(run=run_top_items)
+
+    export = commands.add_parser("export", parents=[dates], help="item lines or receipts")
+    export.add_argument("what", choices=("items", "receipts"))
+    export.add_argument("-j", "--processes", type=int, help="receipt rendering processes")
+    export.set_defaults(run=run_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except sqlite3.Error as exc:
+        # e.g. "no such table: sales_daily" on a database the app has never opened or upgraded
+        raise SystemExit(f"billing-report: {args.db}: {exc} (open it with the app once to create/upgrade "
+                         "its report tables)") from exc
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Restaurant Billing Bulk Loader
+Loads queued offline orders or exported POS history into orders/order_items.
+
+Input is either JSONL or CSV:
+    JSONL - one order per line:
+        {"order_ref": "A-1001", "order_mode": "DINE_IN", "payment_method": "CASH",
+         "customer_name": "", "discount_amount": 0, "created_at": "2024-03-01T13:05:00",
+         "items": [{"item_name": "Masala Dosa", "unit_price": 120.0, "gst_rate": 5.0, "quantity": 2}]}
+      The items use the same fields as the bill_<id>.json export.
+    CSV - one row per item line, order fields repeated on every line and rows of
+      the same order kept together, grouped by order_ref:
+        order_ref,order_mode,payment_method,customer_name,discount_amount,created_at,
+        item_name,unit_price,gst_rate,quantity
+Orders are remembered by order_ref: if a load stops on a bad order, fix the
+file and run it again - orders already loaded are skipped.
+Usage:
+    python bulk_load.py orders.jsonl [--db restaurant_billing.db] [--chunk-size 5000] [--drop-indexes]
+"""
+import argparse
+import csv
+import json
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+
+from db import DB_PATH
+from orders import BULK_CHUNK_SIZE, save_orders_bulk
+
+ORDER_FIELDS = ("order_ref", "order_mode", "payment_method", "customer_name",
+                "discount_amount", "amount_paid", "change_due", "created_at")
+ITEM_FIELDS = ("menu_id", "item_name", "unit_price", "gst_rate", "quantity")
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for _, rows in groupby(csv.DictReader(f), key=itemgetter("order_ref")):
+            rows = list(rows)
+            order = {k: rows[0][k] for k in ORDER_FIELDS if k in rows[0]}
+            order["items"] = [{k: row[k] for k in ITEM_FIELDS if row.get(k) not in (None, "")} for row in rows]
+            yield order
+
+
+def read_orders(path):
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        return read_csv(path)
+    return read_jsonl(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load orders from CSV/JSONL.")
+    parser.add_argument("path", help="orders file (.csv or .jsonl)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--drop-indexes", action="store_true",
+                        help="drop secondary indexes during the load and rebuild them afterwards")
+    args = parser.parse_args()
+
+    loaded, first_id, last_id, skipped = save_orders_bulk(
+        read_orders(args.path), chunk_size=args.chunk_size,
+        drop_indexes=args.drop_indexes, db_path=args.db,
+    )
+    print(f"✔ Loaded {loaded} orders (ids {first_id}..{last_id}) into {args.db}"
+          + (f", skipped {skipped} already loaded" if skipped else ""))
@@ -0,0 +1,91 @@
+"""
+Restaurant Billing Business Day
+The trading day an order belongs to, stored on orders.business_day.
+
+Late-night service runs past midnight, so an order at 01:30 usually belongs to
+the previous evening's takings. CUTOFF_HOUR moves the day boundary: with a
+cutoff of 4, orders from 00:00-03:59 count towards the previous day. It is
+read from the BILLING_DAY_CUTOFF_HOUR environment variable (default 0, i.e.
+calendar days).
+
+Storing the day (instead of grouping by date(created_at)) lets every report
+filter with a plain, indexed range: business_day BETWEEN ? AND ?.
+Usage:
+    BILLING_DAY_CUTOFF_HOUR=4 python business_day.py --restamp
+        # recompute business_day for all orders (archived months too) after
+        # changing the cutoff, then rebuild the rollups and item counters keyed on it
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+
+from db import DB_PATH, register_migration, table_exists, writer
+
+CUTOFF_HOUR = int(os.environ.get("BILLING_DAY_CUTOFF_HOUR", "0"))
+
+
+def business_day_of(created_at, cutoff_hour=CUTOFF_HOUR):
+    """'YYYY-MM-DD' business day for an ISO-8601 timestamp (str or datetime)."""
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)   # also rejects non-ISO input
+    return (created_at - timedelta(hours=cutoff_hour)).date().isoformat()
+
+
+def business_day_sql(column="created_at", cutoff_hour=CUTOFF_HOUR):
+    """The same computation as an SQLite expression over a timestamp column."""
+    return f"date({column}, '-{int(cutoff_hour)} hours')"
+
+
+def today(cutoff_hour=CUTOFF_HOUR):
+    return business_day_of(datetime.now(), cutoff_hour)
+
+
+def last_n_days(n, cutoff_hour=CUTOFF_HOUR):
+    """(start, end) business days covering the last n days, today included."""
+    end = today(cutoff_hour)
+    start = (datetime.fromisoformat(end) - timedelta(days=n - 1)).date().isoformat()
+    return start, end
+
+
+def restamp(con, cutoff_hour=CUTOFF_HOUR):
+    con.execute(f"UPDATE orders SET business_day = {business_day_sql('created_at', cutoff_hour)}")
+
+
+# Covers the header-level reports (sales, payment and order-mode splits) for a day range.
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_orders_business_day
+ON orders(business_day, order_mode, payment_method, total_amount)
+"""
+
+
+@register_migration
+def add_business_day_column(con):
+    if not table_exists(con, "orders"):
+        return
+    columns = [row[1] for row in con.execute("PRAGMA table_info(orders)")]
+    if "business_day" not in columns:
+        con.execute("ALTER TABLE orders ADD COLUMN business_day TEXT")
+        restamp(con)
+    con.execute(INDEX_SQL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain orders.business_day.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--restamp", action="store_true",
+                        help="recompute business_day for all orders and rebuild the rollups")
+    args = parser.parse_args()
+
+    if args.restamp:
+        from archive import restamp_partitions
+        from item_sales import rebuild_item_sales
+        from rollups import rebuild_rollups
+
+        with writer(args.db) as con:
+            restamp(con)
+            restamp_partitions(con)
+            rebuild_rollups(con)
+            rebuild_item_sales(con)
+        print(f"✔ business_day recomputed with a {CUTOFF_HOUR}:00 cutoff in {args.db}")
+    else:
+        parser.print_help()
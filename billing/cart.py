@@ -0,0 +1,84 @@
+"""
+Restaurant Billing Cart
+The order screens' cart, with totals kept up to date line by line.
+
+The screens used to rebuild a qty column over the whole menu DataFrame on
+every rerun, filter it and recompute the bill over every row. A Cart only
+holds the lines actually ordered. set_qty() recomputes that one line with the
+billing engine (billing_engine.py - same rounding, so the totals always equal
+what save_order stores) and adjusts the running subtotal and tax by the
+difference. frame() builds the DataFrame save_order expects only when the
+order is confirmed or shown.
+Usage:
+    cart = Cart()
+    cart.set_qty(menu_row, 2)          # menu_row: (id, item_name, category, price, gst_rate)
+    totals = cart.totals(discount=50)  # paise, like billing_engine.cart_totals
+    save_order("DINE_IN", "UPI", cart.frame(), 50)
+"""
+from billing_engine import CartTotals, line_amounts, to_paise
+
+CART_COLUMNS = ("id", "item_name", "category", "price", "gst_rate", "qty")
+
+
+class CartLine:
+    __slots__ = ("menu_id", "item_name", "category", "price", "gst_rate", "qty", "subtotal", "tax")
+
+    def __init__(self, menu_row, qty):
+        self.menu_id, self.item_name, self.category, self.price, self.gst_rate = menu_row[:5]
+        self.qty = qty
+        subtotal, tax, _ = line_amounts([self.price], [qty], [self.gst_rate])
+        self.subtotal, self.tax = int(subtotal[0]), int(tax[0])
+
+
+class Cart:
+    """Ordered lines keyed by menu id, with running subtotal and tax in paise."""
+
+    __slots__ = ("lines", "subtotal", "tax", "generation")
+
+    def __init__(self):
+        self.lines = {}
+        self.subtotal = 0
+        self.tax = 0
+        self.generation = 0         # bumped by clear(); lets the UI start fresh widgets
+
+    def __len__(self):
+        return len(self.lines)
+
+    def qty(self, menu_id):
+        line = self.lines.get(menu_id)
+        return line.qty if line else 0
+
+    def set_qty(self, menu_row, qty):
+        """Set the quantity of one menu item (0 removes it); only that line is recomputed."""
+        old = self.lines.pop(menu_row[0], None)
+        if old is not None:
+            self.subtotal -= old.subtotal
+            self.tax -= old.tax
+        if qty > 0:
+            line = self.lines[menu_row[0]] = CartLine(menu_row, int(qty))
+            self.subtotal += line.subtotal
+            self.tax += line.tax
+
+    def clear(self):
+        self.lines.clear()
+        self.subtotal = self.tax = 0
+        self.generation += 1
+
+    def totals(self, discount=0.0):
+        """CartTotals in paise, equal to billing_engine.cart_totals(self.frame(), discount)."""
+        lines = self.lines.values()
+        discount = int(to_paise(discount or 0))
+        return CartTotals(
+            [line.subtotal for line in lines], [line.tax for line in lines],
+            [line.subtotal + line.tax for line in lines],
+            self.subtotal, self.tax, discount, self.subtotal + self.tax - discount,
+        )
+
+    def rows(self):
+        return [(line.menu_id, line.item_name, line.category, line.price, line.gst_rate, line.qty)
+                for line in self.lines.values()]
+
+    def frame(self):
+        """The cart as the DataFrame save_order() takes (CART_COLUMNS)."""
+        import pandas as pd
+        return pd.DataFrame(self.rows(), columns=CART_COLUMNS)
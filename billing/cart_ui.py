@@ -0,0 +1,60 @@
+"""
+Restaurant Billing Cart UI
+Streamlit menu picker for the order screens (step 2.py - step 4.py).
+
+The cart (cart.py) lives in st.session_state, so it survives reruns. The menu
+is shown one category at a time, filtered by a search box and cut into pages
+of PAGE_SIZE items: a rerun creates widgets only for the visible page, reads
+the menu from the shared snapshot (menu_cache.get_menu_snapshot) and no
+DataFrame. Each quantity widget updates its own cart line in an on_change
+callback, so a click recomputes one line, not the bill.
+"""
+import streamlit as st
+
+from cart import Cart
+
+PAGE_SIZE = 20
+ALL = "All"
+
+
+def get_cart(key="cart"):
+    """This session's Cart, created on first use."""
+    if key not in st.session_state:
+        st.session_state[key] = Cart()
+    return st.session_state[key]
+
+
+def _on_qty_change(cart, menu_row, widget_key):
+    cart.set_qty(menu_row, st.session_state[widget_key])
+
+
+def visible_items(snapshot, category=ALL, search=""):
+    """Menu rows for a category (or all) whose name contains search, case-insensitively."""
+    rows = snapshot.rows if category == ALL else snapshot.by_category.get(category, [])
+    search = search.strip().lower()
+    return [row for row in rows if search in row[1].lower()] if search else rows
+
+
+def menu_picker(cart, snapshot, max_qty=20, key="menu"):
+    """Category / search / page controls and one quantity input per visible item."""
+    col1, col2 = st.columns([1, 2])
+    category = col1.selectbox("Category", [ALL] + sorted(snapshot.by_category), key=f"{key}_category")
+    search = col2.text_input("Search", key=f"{key}_search", placeholder="Item name")
+
+    rows = visible_items(snapshot, category, search)
+    pages = max(1, -(-len(rows) // PAGE_SIZE))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", 1, pages, 1, key=f"{key}_page_{category}_{search}")
+    if not rows:
+        st.info("No menu items match.")
+
+    for row in rows[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
+        menu_id, item_name, _, price, gst_rate = row[:5]
+        # The generation changes when the cart is cleared, so the inputs start again from 0.
+        widget_key = f"{key}_qty_{cart.generation}_{menu_id}"
+        st.number_input(
+            f"{item_name} ({price} ₹, GST {gst_rate}%)",
+            0, max_qty, min(cart.qty(menu_id), max_qty), key=widget_key,
+            on_change=_on_qty_change, args=(cart, row, widget_key),
+        )
@@ -0,0 +1,213 @@
+"""
+Restaurant Billing DB Connections
+Shared, long-lived SQLite connections for the billing app and report scripts.
+
+The database is switched to WAL mode so report reads never block cashiers
+saving orders (and vice versa). Each database file gets one pool holding:
+    - one writer connection, serialized by a lock, that runs every write
+      inside a single BEGIN IMMEDIATE ... COMMIT transaction
+    - a handful of read-only connections handed out one borrower at a time
+Usage:
+    from db import reader, writer
+
+    with reader() as con:
+        rows = con.execute("SELECT ...").fetchall()
+
+    with writer() as con:          # commits on success, rolls back on error
+        con.execute("INSERT ...")
+
+Modules that add their own tables register a migration with register_migration();
+it runs once, inside a writer transaction, on every pool opened in this process.
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import metrics
+
+DB_PATH = "restaurant_billing.db"
+
+MAX_READERS = 4
+BUSY_TIMEOUT_MS = 5000
+
+# Applied to every connection. journal_mode is persistent in the file, the rest are per-connection.
+COMMON_PRAGMAS = {
+    "busy_timeout": BUSY_TIMEOUT_MS,
+    "cache_size": -16000,          # ~16 MB page cache per connection
+    "temp_store": "MEMORY",
+    "mmap_size": 268435456,        # 256 MB memory-mapped reads
+}
+WRITER_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",       # durable at checkpoints, safe with WAL
+    "foreign_keys": "ON",
+}
+READER_PRAGMAS = {
+    "query_only": "ON",
+}
+
+
+# Schema migrations registered by feature modules (rollups, counters, ...), run once per pool.
+_migrations = []
+
+
+def _apply_pragmas(con, pragmas):
+    for name, value in pragmas.items():
+        con.execute(f"PRAGMA {name}={value}")
+
+
+class ConnectionPool:
+    """Writer + read-only connections for one database file. Safe to share between threads."""
+
+    def __init__(self, db_path=DB_PATH, max_readers=MAX_READERS):
+        self.db_path = Path(db_path).resolve()
+        self.max_readers = max_readers
+        self._readers = queue.LifoQueue()
+        self._all_readers = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._local = threading.local()     # write_depth: nesting of writer() blocks per thread
+        # Opening the writer first creates the file (like sqlite3.connect did) and switches it to WAL.
+        self._writer = self._connect_writer()
+        self._applied = set()
+        self.migrate()
+
+    def _connect_writer(self):
+        con = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        _apply_pragmas(con, COMMON_PRAGMAS)
+        _apply_pragmas(con, WRITER_PRAGMAS)
+        return metrics.instrument(con)
+
+    def _connect_reader(self):
+        uri = self.db_path.as_uri() + "?mode=ro"
+        con = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+        _apply_pragmas(con, COMMON_PRAGMAS)
+        _apply_pragmas(con, READER_PRAGMAS)
+        return metrics.instrument(con)
+
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all_readers) < self.max_readers:
+                con = self._connect_reader()
+                self._all_readers.append(con)
+                return con
+        try:
+            return self._readers.get(timeout=BUSY_TIMEOUT_MS / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"no reader connection available for {self.db_path} after {BUSY_TIMEOUT_MS} ms") from None
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection; returned to the pool afterwards."""
+        con = self._acquire_reader()
+        try:
+            yield con
+        finally:
+            if con.in_transaction:
+                con.rollback()
+            self._readers.put(con)
+
+    @contextmanager
+    def writer(self):
+        """
+        Exclusive use of the writer connection inside one transaction.
+        Nested writer() blocks on the same thread join the outer transaction.
+        """
+        with self._write_lock:
+            con = self._writer
+            depth = getattr(self._local, "write_depth", 0)
+            if depth:
+                self._local.write_depth = depth + 1
+                try:
+                    yield con
+                finally:
+                    self._local.write_depth = depth
+                return
+            con.execute("BEGIN IMMEDIATE")
+            self._local.write_depth = 1
+            committed = False
+            try:
+                yield con
+                con.commit()
+                committed = True
+            finally:
+                self._local.write_depth = 0
+                # A failed body or a failed COMMIT: never leave the transaction open
+                # for the next writer() to join.
+                if not committed and con.in_transaction:
+                    con.rollback()
+
+    def migrate(self):
+        """Run registered migrations that have not yet run on this pool."""
+        with self._write_lock:
+            for fn in _migrations:
+                if fn not in self._applied:
+                    with self.writer() as con:
+                        fn(con)
+                    self._applied.add(fn)
+
+    def close(self):
+        with self._write_lock, self._lock:
+            for con in self._all_readers:
+                con.close()
+            self._all_readers.clear()
+            self._readers = queue.LifoQueue()
+            self._writer.close()
+
+
+# ----------------- Shared pools -----------------
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DB_PATH):
+    """One pool per database file, shared by every caller in this process."""
+    key = Path(db_path).resolve()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key)
+        return pool
+
+
+def register_migration(fn):
+    """
+    Register fn(con) to create/upgrade tables. It must be idempotent; it runs on
+    pools opened later and immediately on pools that are already open.
+    Usable as a decorator.
+    """
+    with _pools_lock:
+        if fn not in _migrations:
+            _migrations.append(fn)
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.migrate()
+    return fn
+
+
+def table_exists(con, name):
+    return con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+
+def reader(db_path=DB_PATH):
+    return get_pool(db_path).reader()
+
+
+def writer(db_path=DB_PATH):
+    return get_pool(db_path).writer()
+
+
+@atexit.register
+def close_all():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
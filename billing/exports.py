@@ -0,0 +1,210 @@
+"""
+Restaurant Billing Exports
+Streaming report export to CSV, JSONL or Parquet in bounded memory.
+
+export_report(df, ...) needs the whole report in a DataFrame first, which does
+not fit for item-level exports over a financial year. export_query() instead
+runs the query on a read-only cursor and writes fetchmany() chunks as they
+come, so memory stays at one chunk whatever the row count.
+    - csv / jsonl, optionally gzip-compressed (gzip=True, adds .gz)
+    - parquet (needs pyarrow; one row group per chunk, gzip = parquet codec;
+      column types are promoted as chunks need it - NULL -> any type,
+      int64 -> double, anything -> string - re-encoding earlier row groups)
+    - progress(rows_written) is called after every chunk
+    - returns ExportSummary(path, rows, sha256) - checksum of the file on disk
+Usage:
+    from exports import export_query
+    from reports import item_lines_query
+
+    export_query(*item_lines_query("2024-04-01", "2025-03-31"), "items_fy25.csv", gzip=True)
+"""
+import csv
+import gzip as gzip_module
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+from db import DB_PATH, reader
+
+CHUNK_SIZE = 10000
+PARQUET_HOLD_CHUNKS = 8
+FORMATS = ("csv", "jsonl", "parquet")
+
+ExportSummary = namedtuple("ExportSummary", "path rows sha256")
+
+
+def iter_query(sql, params=(), chunk_size=CHUNK_SIZE, db_path=DB_PATH):
+    """Yield the column names, then lists of up to chunk_size rows."""
+    with reader(db_path) as con:
+        cur = con.execute(sql, params)
+        yield tuple(c[0] for c in cur.description)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+
+def _open_text(path, gzip):
+    if gzip:
+        return gzip_module.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _write_csv(columns, chunks, path, gzip, progress):
+    rows = 0
+    with _open_text(path, gzip) as f:
+        out = csv.writer(f)
+        out.writerow(columns)
+        for chunk in chunks:
+            out.writerows(chunk)
+            rows += len(chunk)
+            if progress:
+                progress(rows)
+    return rows
+
+
+def _write_jsonl(columns, chunks, path, gzip, progress):
+    rows = 0
+    with _open_text(path, gzip) as f:
+        for chunk in chunks:
+            f.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in chunk)
+            rows += len(chunk)
+            if progress:
+                progress(rows)
+    return rows
+
+
+def _column_types(pa, tables):
+    """Each column's first non-null Arrow type across tables (None while it is all NULL)."""
+    null = pa.null()
+    return [next((t.schema.field(i).type for t in tables if t.schema.field(i).type != null), None)
+            for i in range(tables[0].num_columns)]
+
+
+def _merge_schemas(pa, schema, other):
+    """
+    A schema both fit in, column by column: Arrow's permissive promotion
+    (null -> any, int64 -> double, ...), or string where there is none.
+    """
+    fields = []
+    for field, new in zip(schema, other):
+        try:
+            fields.append(pa.unify_schemas([pa.schema([field]), pa.schema([new.with_name(field.name)])],
+                                           promote_options="permissive").field(0))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            fields.append(pa.field(field.name, pa.string()))
+    return pa.schema(fields)
+
+
+def _parquet_schema(pa, tables):
+    """File schema for the held chunks (a column still all NULL stays null until a chunk types it)."""
+    schema = tables[0].schema
+    for table in tables[1:]:
+        schema = _merge_schemas(pa, schema, table.schema)
+    return schema
+
+
+def _rewrite_parquet(pq, path, schema, compression):
+    """Re-encode the row groups written so far under a wider schema, one at a time. Returns the new writer."""
+    old = f"{path}.tmp"
+    os.replace(path, old)
+    writer = pq.ParquetWriter(path, schema, compression=compression)
+    try:
+        with pq.ParquetFile(old) as source:
+            for i in range(source.num_row_groups):
+                writer.write_table(source.read_row_group(i).cast(schema))
+    except BaseException:
+        writer.close()
+        raise
+    finally:
+        os.remove(old)
+    return writer
+
+
+def _write_parquet(columns, chunks, path, gzip, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from exc
+
+    compression = "gzip" if gzip else "snappy"
+    rows = 0
+    writer = None
+    held = []
+
+    def write(tables):
+        nonlocal rows, writer
+        for table in tables:
+            schema = _merge_schemas(pa, writer.schema, table.schema)
+            if schema != writer.schema:
+                # A later chunk needs a wider type (a float in an int64 column, ...).
+                writer.close()
+                writer = _rewrite_parquet(pq, path, schema, compression)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(table)
+            if progress:
+                progress(rows)
+
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_arrays([pa.array(col) for col in zip(*chunk)], names=list(columns))
+            if writer is not None:
+                write([table])
+                continue
+            # A nullable column (customer_name, ...) can be all NULL in the first
+            # chunk: hold chunks back until every column has a type (at most
+            # PARQUET_HOLD_CHUNKS), so the file rarely needs widening later.
+            held.append(table)
+            if len(held) < PARQUET_HOLD_CHUNKS and None in _column_types(pa, held):
+                continue
+            writer = pq.ParquetWriter(path, _parquet_schema(pa, held), compression=compression)
+            write(held)
+            held = []
+        if held:
+            writer = pq.ParquetWriter(path, _parquet_schema(pa, held), compression=compression)
+            write(held)
+        elif writer is None:
+            # No rows: still leave a valid (empty) file behind.
+            pq.write_table(pa.table({name: pa.array([], pa.null()) for name in columns}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_rows(columns, chunks, path, format="csv", gzip=False, progress=None):
+    """Write an iterable of row chunks. Returns ExportSummary."""
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format {format!r}; expected one of {', '.join(FORMATS)}")
+    path = str(path)
+    if gzip and format != "parquet" and not path.endswith(".gz"):
+        path += ".gz"
+    rows = WRITERS[format](columns, chunks, path, gzip, progress)
+    return ExportSummary(path, rows, file_sha256(path))
+
+
+def export_query(sql, params, path, format="csv", gzip=False, progress=None,
+                 chunk_size=CHUNK_SIZE, db_path=DB_PATH):
+    """Stream a query's result straight to a file. Returns ExportSummary."""
+    chunks = iter_query(sql, params, chunk_size, db_path)
+    columns = next(chunks)
+    return export_rows(columns, chunks, path, format, gzip, progress)
+
+
+def export_report(report, path, format="csv", gzip=False):
+    """Write an already computed reports.Report."""
+    return export_rows(report.columns, [report.rows], path, format, gzip)
@@ -0,0 +1,132 @@
+"""
+Restaurant Billing Item Sales Counters
+Per-item, per-day quantity and sales counters keyed by menu_id.
+
+most_sold_items() used to GROUP BY the free-text item_name over the whole
+order_items table, so it got slower with every order and a renamed item split
+its counts in two. item_sales_daily holds one row per (business day, menu_id), bumped in
+the same transaction as each order, and top_items() ranks over a day range of it.
+Sales are counted in INTEGER paise, like the rollups.
+Usage:
+    python item_sales.py --rebuild    # recompute the counters from order_items (archive included)
+"""
+import argparse
+
+import business_day  # noqa: F401  orders.business_day must exist before the counters are backfilled
+from archive import partition_rows
+from db import DB_PATH, reader, register_migration, table_exists, writer
+
+SCHEMA_SQL = """
+-- Clustered on (day, menu_id): a date-range scan reads only the rows it needs
+-- and already has quantity/sales, so it never touches another index.
+CREATE TABLE IF NOT EXISTS item_sales_daily (
+    day TEXT NOT NULL,
+    menu_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    sales_paise INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, menu_id)
+) WITHOUT ROWID;
+
+-- Per-item history (one menu_id across days) without scanning every day.
+CREATE INDEX IF NOT EXISTS idx_item_sales_menu_day ON item_sales_daily(menu_id, day);
+"""
+
+UPSERT_SQL = """
+INSERT INTO item_sales_daily (day, menu_id, quantity, sales_paise) VALUES (?, ?, ?, ?)
+ON CONFLICT(day, menu_id) DO UPDATE SET
+    quantity = quantity + excluded.quantity,
+    sales_paise = sales_paise + excluded.sales_paise
+"""
+
+ITEM_TOTALS_SQL = """
+SELECT o.business_day, oi.menu_id, SUM(oi.quantity), SUM(CAST(round(oi.line_total * 100) AS INTEGER))
+FROM order_items oi
+JOIN orders o ON o.id = oi.order_id
+GROUP BY 1, 2
+"""
+REBUILD_SQL = "INSERT INTO item_sales_daily (day, menu_id, quantity, sales_paise)" + ITEM_TOTALS_SQL
+
+
+def record_items(con, lines):
+    """
+    Add sold lines to the counters. lines: iterable of (business_day, menu_id, quantity, line_total in rupees).
+    Must be called on the writer connection inside the order's transaction.
+    """
+    per_key = {}
+    for day, menu_id, qty, line_total in lines:
+        key = (day, menu_id)
+        q, s = per_key.get(key, (0, 0))
+        per_key[key] = (q + qty, s + round(line_total * 100))
+    con.executemany(UPSERT_SQL, [(day, menu_id, q, s) for (day, menu_id), (q, s) in per_key.items()])
+
+
+def rebuild_item_sales(con):
+    """Recompute the counters from order_items, live and archived (archive.py)."""
+    con.execute("DELETE FROM item_sales_daily")
+    con.execute(REBUILD_SQL)
+    con.executemany(UPSERT_SQL, partition_rows(con, ITEM_TOTALS_SQL))
+
+
+@register_migration
+def create_item_sales_table(con):
+    if not table_exists(con, "menu"):
+        return
+    # A table from before sales were kept in paise (REAL sales column): rebuild it.
+    if "sales" in [row[1] for row in con.execute("PRAGMA table_info(item_sales_daily)")]:
+        con.execute("DROP TABLE item_sales_daily")
+    missing = not table_exists(con, "item_sales_daily")
+    for statement in SCHEMA_SQL.split(";"):
+        if statement.strip():
+            con.execute(statement)
+    if missing and table_exists(con, "order_items"):
+        rebuild_item_sales(con)
+
+
+def top_items_query(start=None, end=None, category=None, limit=10):
+    """
+    SQL + params ranking items by quantity sold. start/end are inclusive days
+    (date or 'YYYY-MM-DD'); None leaves that side open.
+    """
+    where, params = [], []
+    if start is not None:
+        where.append("s.day >= ?")
+        params.append(str(start))
+    if end is not None:
+        where.append("s.day <= ?")
+        params.append(str(end))
+    if category is not None:
+        where.append("m.category = ?")
+        params.append(category)
+    sql = f"""
+        SELECT m.id AS menu_id, m.item_name, m.category,
+               SUM(s.quantity) AS total_qty, SUM(s.sales_paise) / 100.0 AS total_sales
+        FROM item_sales_daily s
+        JOIN menu m ON m.id = s.menu_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        GROUP BY s.menu_id
+        ORDER BY total_qty DESC
+        LIMIT ?
+    """
+    params.append(int(limit))
+    return sql, params
+
+
+def top_items(start=None, end=None, category=None, limit=10, db_path=DB_PATH):
+    """Top items as (menu_id, item_name, category, total_qty, total_sales) rows."""
+    sql, params = top_items_query(start, end, category, limit)
+    with reader(db_path) as con:
+        return con.execute(sql, params).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain per-item daily sales counters.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="recompute the counters from order_items")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        with writer(args.db) as con:
+            rebuild_item_sales(con)
+        print(f"✔ Item sales counters rebuilt in {args.db}")
+    else:
+        parser.print_help()
@@ -0,0 +1,283 @@
+"""
+Restaurant Billing Live Sales
+In-memory rolling sales counters for the live dashboard (step 7.py).
+
+Two ring buffers of time buckets - one per minute for the last MINUTES
+minutes, one per hour for the last HOURS hours - each holding orders and
+sales in total and by order mode, payment method and menu category. The
+order screens call start_live_sales() when the app starts: it publishes the
+counters and warm-starts them from the database (orders of the last HOURS
+hours) in a background thread. From then on both save_order paths add every
+order they commit (orders.remember_prepared) and the dashboard only reads
+memory, so a refresh is a few dict sums under a lock and never touches SQLite.
+
+Orders only count once: orders committed while the warm start runs are held
+back and replayed after it, and anything the warm start loaded (ids up to
+loaded_through) is skipped. Orders written by other processes (bulk_load.py,
+another app instance) appear after the next restart.
+Usage:
+    from live_sales import get_live_sales, start_live_sales
+    start_live_sales()                # at app start; returns at once
+    live = get_live_sales()
+    live.summary(minutes=30)          # orders, sales, by_mode, by_payment, by_category
+    live.per_hour(since=live.day_start())
+"""
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from business_day import CUTOFF_HOUR, today
+from db import DB_PATH, reader
+from menu_cache import get_menu_cache
+
+MINUTES = 120
+HOURS = 48
+EPOCH = datetime(2000, 1, 1)
+
+WARM_ORDERS_SQL = """
+    SELECT id, created_at, order_mode, payment_method, total_amount
+    FROM orders WHERE created_at >= ? ORDER BY id
+"""
+WARM_LINES_SQL = """
+    SELECT oi.order_id, oi.menu_id, oi.quantity, oi.line_total
+    FROM orders o JOIN order_items oi ON oi.order_id = o.id
+    WHERE o.created_at >= ?
+"""
+
+
+class Bucket:
+    """Counters for one minute or hour."""
+
+    __slots__ = ("key", "orders", "sales", "by_mode", "by_payment", "by_category")
+
+    def __init__(self, key):
+        self.key = key
+        self.orders = 0
+        self.sales = 0.0
+        self.by_mode = {}           # order_mode -> [orders, sales]
+        self.by_payment = {}        # payment_method -> [orders, sales]
+        self.by_category = {}       # category -> [quantity, sales]
+
+    def add(self, order_mode, payment_method, total, categories):
+        self.orders += 1
+        self.sales += total
+        for counts, key in ((self.by_mode, order_mode), (self.by_payment, payment_method)):
+            entry = counts.get(key)
+            if entry is None:
+                entry = counts[key] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += total
+        for category, quantity, line_total in categories:
+            entry = self.by_category.get(category)
+            if entry is None:
+                entry = self.by_category[category] = [0, 0.0]
+            entry[0] += quantity
+            entry[1] += line_total
+
+
+class Ring:
+    """Fixed number of consecutive buckets of `width` seconds; old ones are overwritten."""
+
+    def __init__(self, size, width):
+        self.size = size
+        self.width = width
+        self.buckets = [Bucket(None) for _ in range(size)]
+
+    def key(self, when):
+        return int((when - EPOCH).total_seconds()) // self.width
+
+    def start(self, key):
+        return EPOCH + timedelta(seconds=key * self.width)
+
+    def bucket(self, key):
+        slot = key % self.size
+        bucket = self.buckets[slot]
+        if bucket.key != key:
+            bucket = self.buckets[slot] = Bucket(key)
+        return bucket
+
+    def window(self, first_key, last_key):
+        """Live buckets with first_key <= key <= last_key, oldest first."""
+        first_key = max(first_key, last_key - self.size + 1)
+        return [b for b in (self.buckets[key % self.size] for key in range(first_key, last_key + 1))
+                if b.key is not None and first_key <= b.key <= last_key]
+
+
+def _merge(buckets, field):
+    merged = {}
+    for bucket in buckets:
+        for key, (count, sales) in getattr(bucket, field).items():
+            entry = merged.setdefault(key, [0, 0.0])
+            entry[0] += count
+            entry[1] += sales
+    return {key: (count, round(sales, 2)) for key, (count, sales) in merged.items()}
+
+
+class LiveSales:
+    """Per-minute and per-hour sales counters for one database. Thread-safe."""
+
+    def __init__(self, db_path=DB_PATH, minutes=MINUTES, hours=HOURS):
+        self.db_path = Path(db_path).resolve()
+        self.minutes = Ring(minutes, 60)
+        self.hours = Ring(hours, 3600)
+        self.loaded_through = 0
+        self._lock = threading.Lock()
+        self._categories = {}
+        self._pending = []              # record() calls that arrive during the warm start
+        self._pending_lock = threading.Lock()
+        self.ready = threading.Event()  # set once the warm start has finished
+
+    def _category(self, menu_id):
+        category = self._categories.get(menu_id)
+        if category is None:
+            # An item added since the warm start: reload the map from the menu cache.
+            self._categories.update((row[0], row[2]) for row in get_menu_cache(self.db_path).get().rows)
+            category = self._categories.setdefault(menu_id, "Other")
+        return category
+
+    def warm_start(self):
+        """
+        Load the orders of the last `hours` hours from the database, then count
+        the orders record() held back meanwhile that the load did not see.
+        """
+        since = (datetime.now() - timedelta(hours=self.hours.size)).isoformat()
+        with reader(self.db_path) as con:
+            # One read transaction, so the orders and their lines come from the same snapshot.
+            con.execute("BEGIN")
+            self._categories.update(con.execute("SELECT id, category FROM menu"))
+            lines = {}
+            for order_id, menu_id, quantity, line_total in con.execute(WARM_LINES_SQL, (since,)):
+                lines.setdefault(order_id, []).append((menu_id, quantity, line_total))
+            orders = con.execute(WARM_ORDERS_SQL, (since,)).fetchall()
+            con.execute("COMMIT")
+        for order_id, created_at, order_mode, payment_method, total in orders:
+            self._add(order_id, created_at, order_mode, payment_method, total, lines.get(order_id, ()))
+        self.loaded_through = max(self.loaded_through, orders[-1][0] if orders else 0)
+
+        with self._pending_lock:
+            pending, self._pending = self._pending, None
+        for order in pending:
+            self.record(*order)
+        self.ready.set()
+
+    def record(self, order_id, created_at, order_mode, payment_method, total, lines):
+        """Count one committed order. lines: (menu_id, quantity, line_total) tuples."""
+        if self._pending is not None:
+            with self._pending_lock:
+                if self._pending is not None:
+                    self._pending.append((order_id, created_at, order_mode, payment_method, total, lines))
+                    return
+        if order_id <= self.loaded_through:
+            return
+        self._add(order_id, created_at, order_mode, payment_method, total, lines)
+
+    def _add(self, order_id, created_at, order_mode, payment_method, total, lines):
+        when = datetime.fromisoformat(created_at) if isinstance(created_at, str) else created_at
+        categories = [(self._category(menu_id), quantity, line_total) for menu_id, quantity, line_total in lines]
+        with self._lock:
+            for ring in (self.minutes, self.hours):
+                key = ring.key(when)
+                if key > ring.key(datetime.now()) - ring.size:     # still inside the window
+                    ring.bucket(key).add(order_mode, payment_method, total, categories)
+
+    # ----------------- Reading -----------------
+    def day_start(self):
+        """When the current business day began (business_day.py cutoff)."""
+        return datetime.fromisoformat(today()) + timedelta(hours=CUTOFF_HOUR)
+
+    def _summary(self, buckets):
+        return {
+            "orders": sum(b.orders for b in buckets),
+            "sales": round(sum(b.sales for b in buckets), 2),
+            "by_mode": _merge(buckets, "by_mode"),
+            "by_payment": _merge(buckets, "by_payment"),
+            "by_category": _merge(buckets, "by_category"),
+        }
+
+    def summary(self, minutes=30):
+        """Totals for the last `minutes` minutes (current minute included)."""
+        now = self.minutes.key(datetime.now())
+        with self._lock:
+            return self._summary(self.minutes.window(now - minutes + 1, now))
+
+    def summary_since(self, since):
+        """Totals from the hour containing `since` up to now, e.g. since=day_start()."""
+        now = datetime.now()
+        with self._lock:
+            return self._summary(self.hours.window(self.hours.key(since), self.hours.key(now)))
+
+    def _series(self, ring, first_key, last_key):
+        with self._lock:
+            by_key = {b.key: (b.orders, round(b.sales, 2)) for b in ring.window(first_key, last_key)}
+        return [(ring.start(key),) + by_key.get(key, (0, 0.0)) for key in range(first_key, last_key + 1)]
+
+    def per_minute(self, minutes=60):
+        """[(minute start, orders, sales)] for the last `minutes` minutes, empty minutes included."""
+        now = self.minutes.key(datetime.now())
+        return self._series(self.minutes, now - min(minutes, self.minutes.size) + 1, now)
+
+    def per_hour(self, hours=24, since=None):
+        """[(hour start, orders, sales)] for the last `hours` hours, or from `since` to now."""
+        now = self.hours.key(datetime.now())
+        first = now - hours + 1 if since is None else self.hours.key(since)
+        return self._series(self.hours, max(first, now - self.hours.size + 1), now)
+
+
+# ----------------- Shared counters -----------------
+_live = {}
+_live_lock = threading.Lock()
+
+
+def _warm(live):
+    try:
+        live.warm_start()
+    finally:
+        if not live.ready.is_set():
+            # Failed: forget the instance so the next call starts again from the database.
+            with _live_lock:
+                _live.pop(live.db_path, None)
+            live.ready.set()
+
+
+def start_live_sales(db_path=DB_PATH, wait=False):
+    """
+    The process-wide LiveSales for db_path. The first call publishes it - so
+    record_order() starts counting at once - and warm-starts it in a background
+    thread (wait=True: in this thread).
+    """
+    key = Path(db_path).resolve()
+    with _live_lock:
+        live = _live.get(key)
+        if live is not None:
+            return live
+        live = _live[key] = LiveSales(key)
+    if wait:
+        _warm(live)
+    else:
+        threading.Thread(target=_warm, args=(live,), name="live-sales-warm-start", daemon=True).start()
+    return live
+
+
+def get_live_sales(db_path=DB_PATH):
+    """The process-wide LiveSales for db_path, once its warm start has finished."""
+    live = start_live_sales(db_path, wait=True)
+    live.ready.wait()
+    return live
+
+
+def record_order(order_id, created_at, order_mode, payment_method, total, lines, db_path=DB_PATH):
+    """
+    Called by the write path after commit. A no-op until the live counters have
+    been started (start_live_sales / get_live_sales).
+    """
+    live = _live.get(Path(db_path).resolve())
+    if live is not None:
+        live.record(order_id, created_at, order_mode, payment_method, total, lines)
+
+
+def record_orders(orders, db_path=DB_PATH):
+    """record_order() for an iterable of its argument tuples; not consumed while the counters are off."""
+    live = _live.get(Path(db_path).resolve())
+    if live is not None:
+        for order in orders:
+            live.record(*order)
@@ -0,0 +1,152 @@
+"""
+Restaurant Billing Menu Cache
+In-process cache of the active menu, shared by every Streamlit session.
+
+Streamlit reruns the whole script on each widget click, and every rerun used to
+run SELECT ... FROM menu. The cache keeps the active menu in memory, indexed by
+id and by category, and only reloads it when the menu has really changed:
+    - PRAGMA data_version on the cache's own connection tells us whether anyone
+      (this process or another) committed since the last check
+    - if so, menu_version - bumped by triggers on menu - tells us whether the
+      commit touched the menu or was just another order
+upload_menu() also calls invalidate() directly.
+Usage:
+    from menu_cache import get_menu, get_menu_snapshot, menu_cache_stats
+    menu = get_menu()               # DataFrame copy, safe to add a 'qty' column to
+    snapshot = get_menu_snapshot()  # shared rows/by_category tuples, no DataFrame (cart_ui.py)
+"""
+import sqlite3
+import threading
+from pathlib import Path
+
+import metrics
+from db import DB_PATH, get_pool, register_migration, table_exists
+
+MENU_COLUMNS = ("id", "item_name", "category", "price", "gst_rate")
+MENU_SQL = "SELECT id, item_name, category, price, gst_rate FROM menu WHERE is_active=1 ORDER BY id"
+
+SCHEMA_SQL = (
+    """CREATE TABLE IF NOT EXISTS menu_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )""",
+    "INSERT OR IGNORE INTO menu_version (id, version) VALUES (1, 0)",
+    """CREATE TRIGGER IF NOT EXISTS trg_menu_version_ins AFTER INSERT ON menu
+       BEGIN UPDATE menu_version SET version = version + 1 WHERE id = 1; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_menu_version_upd AFTER UPDATE ON menu
+       BEGIN UPDATE menu_version SET version = version + 1 WHERE id = 1; END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_menu_version_del AFTER DELETE ON menu
+       BEGIN UPDATE menu_version SET version = version + 1 WHERE id = 1; END""",
+)
+
+
+@register_migration
+def create_menu_version(con):
+    if not table_exists(con, "menu"):
+        return
+    for statement in SCHEMA_SQL:
+        con.execute(statement)
+
+
+class MenuSnapshot:
+    """One immutable load of the active menu."""
+
+    def __init__(self, rows, version):
+        self.rows = rows
+        self.version = version
+        self.by_id = {row[0]: row for row in rows}
+        self.by_category = {}
+        for row in rows:
+            self.by_category.setdefault(row[2], []).append(row)
+        self._frame = None
+
+    def frame(self):
+        """The menu as a DataFrame (built once per snapshot, copied per caller)."""
+        if self._frame is None:
+            import pandas as pd
+            self._frame = pd.DataFrame(self.rows, columns=MENU_COLUMNS)
+        return self._frame.copy()
+
+
+class MenuCache:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path).resolve()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._data_version = None
+        get_pool(self.db_path)  # make sure menu_version and its triggers exist
+        # data_version is per connection, so the cache keeps its own.
+        self._con = metrics.instrument(sqlite3.connect(self.db_path.as_uri() + "?mode=ro", uri=True,
+                                                       isolation_level=None, check_same_thread=False))
+
+    def _menu_version(self):
+        row = self._con.execute("SELECT version FROM menu_version WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    def get(self):
+        with self._lock:
+            (data_version,) = self._con.execute("PRAGMA data_version").fetchone()
+            snapshot = self._snapshot
+            if snapshot is not None and data_version != self._data_version:
+                # Something was committed; only reload if it was the menu.
+                if self._menu_version() != snapshot.version:
+                    snapshot = None
+            self._data_version = data_version
+            if snapshot is not None:
+                self.hits += 1
+                return snapshot
+
+            self.misses += 1
+            self._con.execute("BEGIN")
+            try:
+                version = self._menu_version()
+                rows = self._con.execute(MENU_SQL).fetchall()
+            finally:
+                self._con.execute("COMMIT")
+            metrics.count_rows(read=len(rows))
+            self._snapshot = MenuSnapshot(rows, version)
+            return self._snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "version": self._snapshot.version if self._snapshot else None}
+
+
+# ----------------- Shared caches -----------------
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_menu_cache(db_path=DB_PATH):
+    key = Path(db_path).resolve()
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = MenuCache(key)
+        return cache
+
+
+@metrics.timed()
+def get_menu(db_path=DB_PATH):
+    """Active menu as a fresh DataFrame (id, item_name, category, price, gst_rate)."""
+    return get_menu_cache(db_path).get().frame()
+
+
+@metrics.timed()
+def get_menu_snapshot(db_path=DB_PATH):
+    """The active menu as a shared MenuSnapshot (rows, by_id, by_category) - no DataFrame, do not modify."""
+    return get_menu_cache(db_path).get()
+
+
+def invalidate_menu(db_path=DB_PATH):
+    get_menu_cache(db_path).invalidate()
+
+
+def menu_cache_stats(db_path=DB_PATH):
+    return get_menu_cache(db_path).stats()
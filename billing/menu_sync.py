@@ -0,0 +1,106 @@
+"""
+Restaurant Billing Menu Sync
+Set-based bulk upsert of an uploaded menu CSV with a change report.
+
+The old upload_menu ran one INSERT OR REPLACE per CSV row, which deleted and
+re-inserted every item (resetting created_at) even when nothing had changed.
+sync_menu() instead:
+    1. stages the whole file into a temp table with one executemany
+    2. diffs the stage against menu
+    3. applies only real inserts, updates and deactivations (is_active=0)
+       with a handful of set-based statements
+Uploading an unchanged file therefore writes nothing to menu.
+"""
+from collections import namedtuple
+
+from db import DB_PATH, writer
+from menu_cache import invalidate_menu
+
+MenuChanges = namedtuple("MenuChanges", "inserted updated reactivated deactivated unchanged")
+
+STAGE_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS menu_stage (
+    item_name TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    gst_rate REAL NOT NULL
+)
+"""
+
+# Existing items whose category/price/GST differ from the file.
+CHANGED_SQL = """
+SELECT s.item_name FROM menu_stage s
+JOIN menu m ON m.item_name = s.item_name
+WHERE m.category IS NOT s.category OR m.price <> s.price OR m.gst_rate <> s.gst_rate
+"""
+
+REACTIVATED_SQL = """
+SELECT s.item_name FROM menu_stage s
+JOIN menu m ON m.item_name = s.item_name
+WHERE m.is_active = 0
+"""
+
+NEW_SQL = """
+SELECT s.item_name FROM menu_stage s
+WHERE NOT EXISTS (SELECT 1 FROM menu m WHERE m.item_name = s.item_name)
+"""
+
+MISSING_SQL = """
+SELECT item_name FROM menu
+WHERE is_active = 1 AND item_name NOT IN (SELECT item_name FROM menu_stage)
+"""
+
+
+def sync_menu(df, deactivate_missing=True, db_path=DB_PATH):
+    """
+    Make the active menu match df (columns: item_name, category, price, gst_rate).
+    Items not in df are deactivated unless deactivate_missing is False.
+    Returns a MenuChanges report of item names (unchanged is a count).
+    """
+    with writer(db_path) as con:
+        con.execute(STAGE_SQL)
+        con.execute("DELETE FROM temp.menu_stage")
+        # Last row wins if the file lists an item twice, like the old row-by-row upload.
+        con.executemany(
+            "INSERT OR REPLACE INTO temp.menu_stage (item_name, category, price, gst_rate) VALUES (?, ?, ?, ?)",
+            zip(df['item_name'].tolist(), df['category'].tolist(),
+                df['price'].astype(float).tolist(), df['gst_rate'].astype(float).tolist()),
+        )
+
+        changed = [name for (name,) in con.execute(CHANGED_SQL)]
+        reactivated = [name for (name,) in con.execute(REACTIVATED_SQL)]
+        new = [name for (name,) in con.execute(NEW_SQL)]
+        missing = [name for (name,) in con.execute(MISSING_SQL)] if deactivate_missing else []
+
+        if new:
+            con.execute("""
+                INSERT INTO menu (item_name, category, price, gst_rate)
+                SELECT s.item_name, s.category, s.price, s.gst_rate FROM menu_stage s
+                WHERE NOT EXISTS (SELECT 1 FROM menu m WHERE m.item_name = s.item_name)
+            """)
+        if changed or reactivated:
+            con.execute(f"""
+                UPDATE menu SET
+                    category = (SELECT category FROM menu_stage s WHERE s.item_name = menu.item_name),
+                    price = (SELECT price FROM menu_stage s WHERE s.item_name = menu.item_name),
+                    gst_rate = (SELECT gst_rate FROM menu_stage s WHERE s.item_name = menu.item_name),
+                    is_active = 1,
+                    updated_at = datetime('now')
+                WHERE item_name IN ({CHANGED_SQL} UNION {REACTIVATED_SQL})
+            """)
+        if missing:
+            con.execute(f"""
+                UPDATE menu SET is_active = 0, updated_at = datetime('now')
+                WHERE item_name IN ({MISSING_SQL})
+            """)
+
+        (staged,) = con.execute("SELECT COUNT(*) FROM temp.menu_stage").fetchone()
+        con.execute("DELETE FROM temp.menu_stage")
+
+    changes = MenuChanges(
+        inserted=new, updated=changed, reactivated=reactivated, deactivated=missing,
+        unchanged=staged - len(new) - len(set(changed) | set(reactivated)),
+    )
+    if new or changed or reactivated or missing:
+        invalidate_menu(db_path)
+    return changes
@@ -0,0 +1,334 @@
+"""
+Restaurant Billing Metrics
+Latency histograms, call counts, row counts and SQL statement timings for the hot paths.
+
+Off unless BILLING_METRICS=1 is set (or enable() is called before the first
+database connection is opened). While off, @timed() functions cost one flag
+check and span()/count_rows() return immediately, and no trace callback is
+installed on the connections.
+
+While on:
+    - @timed() functions and `with span(name):` blocks record a latency
+      histogram, calls, errors and the rows count_rows() reports inside them
+    - every pooled connection (db.py) gets a SQLite trace callback. Each
+      statement is counted as "sql <VERB> <table>"; inside a span it is also
+      timed, from its start to the next statement or the end of the span on
+      that thread - i.e. including fetching its rows
+    - observe(name, seconds) records any other duration, e.g. a whole
+      Streamlit rerun
+
+Metrics live in this process only (receipt rendering workers are not counted).
+They are exported as Prometheus text or JSON: write_metrics() (also run at exit
+when BILLING_METRICS_FILE is set), serve() for a /metrics endpoint, and the
+"Admin: Metrics" tab of step 2.py.
+Usage:
+    BILLING_METRICS=1 BILLING_METRICS_FILE=metrics.prom streamlit run "step 2.py"
+
+    import metrics
+    metrics.serve(9464)              # http://127.0.0.1:9464/metrics for this process
+"""
+import atexit
+import bisect
+import functools
+import os
+import threading
+import time
+
+METRICS_FILE = os.environ.get("BILLING_METRICS_FILE")
+# Histogram bucket upper bounds, seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.environ.get("BILLING_METRICS", "").lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class Metric:
+    """Histogram + counters for one instrumented name."""
+
+    __slots__ = ("calls", "errors", "count", "sum", "buckets", "rows_read", "rows_written")
+
+    def __init__(self):
+        self.calls = 0              # calls/statements seen
+        self.errors = 0
+        self.count = 0              # of those, how many were timed
+        self.sum = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)     # last one is +Inf
+        self.rows_read = 0
+        self.rows_written = 0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None if nothing was timed)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+_metrics = {}
+
+
+def _metric(name):
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics[name] = Metric()
+    return metric
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    """Turn metrics on. Connections opened earlier are not traced."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _metrics.clear()
+
+
+def _stack():
+    stack = getattr(_local, "spans", None)
+    if stack is None:
+        stack = _local.spans = []
+    return stack
+
+
+# ----------------- Recording -----------------
+class Span:
+    """Times a block; rows reported by count_rows() inside it are added to it."""
+
+    __slots__ = ("name", "rows_read", "rows_written", "_started")
+
+    def __init__(self, name):
+        self.name = name
+        self.rows_read = 0
+        self.rows_written = 0
+
+    def __enter__(self):
+        _stack().append(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        now = time.perf_counter()
+        _finish_statement(now)
+        _stack().pop()
+        with _lock:
+            metric = _metric(self.name)
+            metric.calls += 1
+            metric.errors += exc_type is not None
+            metric.observe(now - self._started)
+            metric.rows_read += self.rows_read
+            metric.rows_written += self.rows_written
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+    rows_read = rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing a block as `name` (a no-op while disabled)."""
+    return Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name=None):
+    """Decorator: time every call of the function as `name` (default module.function)."""
+    def decorate(fn):
+        metric = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(metric):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count_rows(read=0, written=0):
+    """Add rows read/written to the innermost span on this thread, if any."""
+    if not _enabled:
+        return
+    stack = getattr(_local, "spans", None)
+    if stack:
+        stack[-1].rows_read += read
+        stack[-1].rows_written += written
+
+
+def observe(name, seconds):
+    """Record one duration measured elsewhere."""
+    if not _enabled:
+        return
+    with _lock:
+        metric = _metric(name)
+        metric.calls += 1
+        metric.observe(seconds)
+
+
+# ----------------- SQL statements -----------------
+@functools.lru_cache(maxsize=1024)
+def statement_key(sql):
+    """'sql SELECT orders', 'sql INSERT order_items', 'sql -- TRIGGER trg_x', 'sql BEGIN', ..."""
+    code = "\n".join(line for line in sql.splitlines() if not line.lstrip().startswith("--"))
+    words = (code or sql).replace("(", " ").split()
+    if not words:
+        return "sql ?"
+    if words[0] == "--":
+        return "sql " + " ".join(words[:3])
+    verb = words[0].upper()
+    words = [word for word in words if word.upper() not in ("IF", "NOT", "EXISTS")]
+    for i, word in enumerate(words[:-1]):
+        if word.upper() in ("FROM", "INTO", "UPDATE", "TABLE", "INDEX"):
+            return f"sql {verb} {words[i + 1]}"
+    return f"sql {verb}"
+
+
+def _finish_statement(now):
+    pending = getattr(_local, "statement", None)
+    if pending is not None:
+        _local.statement = None
+        with _lock:
+            _metric(pending[0]).observe(now - pending[1])
+
+
+def _on_statement(sql):
+    key = statement_key(sql)
+    now = time.perf_counter()
+    _finish_statement(now)
+    with _lock:
+        _metric(key).calls += 1
+    # Outside a span there is no end to measure to (the connection may just go idle).
+    if getattr(_local, "spans", None):
+        _local.statement = (key, now)
+
+
+def instrument(con):
+    """Install the statement trace callback on a new connection while metrics are on."""
+    if _enabled:
+        con.set_trace_callback(_on_statement)
+    return con
+
+
+# ----------------- Export -----------------
+def snapshot():
+    """One dict per metric name: calls, errors, timed count, mean/p50/p95/p99 ms, rows."""
+    with _lock:
+        items = sorted(_metrics.items())
+        rows = []
+        for name, m in items:
+            rows.append({
+                "name": name, "calls": m.calls, "errors": m.errors, "timed": m.count,
+                "mean_ms": round(1000 * m.sum / m.count, 3) if m.count else None,
+                **{f"p{int(q * 100)}_ms": (None if m.quantile(q) is None else 1000 * m.quantile(q))
+                   for q in (0.5, 0.95, 0.99)},
+                "rows_read": m.rows_read, "rows_written": m.rows_written,
+            })
+    return rows
+
+
+def _label(name):
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+# (counter family, Metric attribute); apart from calls, zero samples are left out
+COUNTERS = (
+    ("billing_calls_total", "calls"),
+    ("billing_errors_total", "errors"),
+    ("billing_rows_read_total", "rows_read"),
+    ("billing_rows_written_total", "rows_written"),
+)
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format, one contiguous block per family."""
+    with _lock:
+        items = [(f'name="{_label(name)}"', m) for name, m in sorted(_metrics.items())]
+        lines = ["# TYPE billing_duration_seconds histogram"]
+        for label, m in items:
+            if m.count:
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), m.buckets):
+                    cumulative += n
+                    lines.append(f'billing_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f"billing_duration_seconds_sum{{{label}}} {m.sum}")
+                lines.append(f"billing_duration_seconds_count{{{label}}} {m.count}")
+        for family, attr in COUNTERS:
+            lines.append(f"# TYPE {family} counter")
+            lines.extend(f"{family}{{{label}}} {getattr(m, attr)}"
+                         for label, m in items if attr == "calls" or getattr(m, attr))
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=METRICS_FILE):
+    """Write the metrics to path (.json = snapshot() as JSON, else Prometheus text), atomically."""
+    if str(path).endswith(".json"):
+        import json
+        text = json.dumps(snapshot(), indent=2)
+    else:
+        text = prometheus_text()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return path
+
+
+def serve(port=9464, host="127.0.0.1"):
+    """Serve /metrics on a daemon thread of this process. Returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+@atexit.register
+def _write_at_exit():
+    if _enabled and METRICS_FILE:
+        write_metrics(METRICS_FILE)
+
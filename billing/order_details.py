@@ -0,0 +1,154 @@
+"""
+Restaurant Billing Order Details
+Batch order lookup with an LRU cache of recent orders.
+
+get_orders_details(ids) fetches headers and items for many orders with one
+joined query (per chunk of ids) and returns compact OrderDetails tuples. In
+front of it sits a bounded LRU cache per database. save_order() puts every
+order it commits straight into the cache, so showing or reprinting the bill
+that was just saved never goes back to the database. Ids not in the live
+database are looked up in the archived months (archive.py) that hold them.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+
+import archive
+import metrics
+from db import DB_PATH, reader
+
+CACHE_SIZE = 512
+FETCH_CHUNK = 500           # ids per IN (...) query, under SQLite's variable limit
+
+ORDER_COLUMNS = ("id", "order_mode", "table_no", "customer_name", "subtotal", "discount_amount",
+                 "tax_amount", "total_amount", "payment_method", "amount_paid", "change_due",
+                 "created_at", "notes", "business_day")
+ITEM_COLUMNS = ("menu_id", "item_name", "unit_price", "gst_rate", "quantity",
+                "line_subtotal", "line_tax", "line_total")
+
+# order: dict of ORDER_COLUMNS; items: tuple of ITEM_COLUMNS tuples in insertion order
+OrderDetails = namedtuple("OrderDetails", "order items")
+
+DETAILS_SQL = f"""
+    SELECT {", ".join("o." + c for c in ORDER_COLUMNS)}, {", ".join("oi." + c for c in ITEM_COLUMNS)}
+    FROM {{schema}}.orders o
+    LEFT JOIN {{schema}}.order_items oi ON oi.order_id = o.id
+    WHERE o.id IN ({{marks}})
+    ORDER BY o.id, oi.id
+"""
+
+
+def _fetch(con, order_ids, schema):
+    order_ids = list(order_ids)
+    n = len(ORDER_COLUMNS)
+    details = {}
+    for i in range(0, len(order_ids), FETCH_CHUNK):
+        ids = order_ids[i:i + FETCH_CHUNK]
+        order, items = None, None
+        for row in con.execute(DETAILS_SQL.format(schema=schema, marks=",".join("?" * len(ids))), ids):
+            if order is None or order["id"] != row[0]:
+                if order is not None:
+                    details[order["id"]] = OrderDetails(order, tuple(items))
+                order, items = dict(zip(ORDER_COLUMNS, row[:n])), []
+            if row[n + 1] is not None:      # LEFT JOIN: an order with no items
+                items.append(row[n:])
+        if order is not None:
+            details[order["id"]] = OrderDetails(order, tuple(items))
+    return details
+
+
+def fetch_orders_details(con, order_ids):
+    """
+    {order_id: OrderDetails} for the ids that exist, straight from the database;
+    ids not in the live database are looked up in the archive partitions holding them.
+    """
+    order_ids = list(order_ids)
+    details = _fetch(con, order_ids, "main")
+    missing = [order_id for order_id in order_ids if order_id not in details]
+    for schema in archive.iter_partitions(con, archive.partitions_for_ids(con, missing)):
+        details.update(_fetch(con, missing, schema))
+    return details
+
+
+class OrderCache:
+    """Thread-safe LRU of OrderDetails keyed by order id."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, order_ids):
+        found = {}
+        with self._lock:
+            for order_id in order_ids:
+                details = self._entries.get(order_id)
+                if details is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(order_id)
+                    self.hits += 1
+                    found[order_id] = details
+        return found
+
+    def put_many(self, details):
+        with self._lock:
+            for order_id, entry in details.items():
+                self._entries[order_id] = entry
+                self._entries.move_to_end(order_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def latest_id(self):
+        """Most recently saved or viewed order id, if any."""
+        with self._lock:
+            return next(reversed(self._entries), None)
+
+    def stats(self):
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# ----------------- Shared caches -----------------
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_order_cache(db_path=DB_PATH):
+    key = Path(db_path).resolve()
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = OrderCache()
+        return cache
+
+
+def remember_order(order_id, order, lines, db_path=DB_PATH):
+    """
+    Cache an order the write path has just committed.
+    order: mapping of the inserted orders columns; lines: ITEM_COLUMNS tuples.
+    """
+    header = {column: order.get(column) for column in ORDER_COLUMNS}
+    header["id"] = order_id
+    get_order_cache(db_path).put_many({order_id: OrderDetails(header, tuple(lines))})
+
+
+@metrics.timed()
+def get_orders_details(order_ids, db_path=DB_PATH):
+    """{order_id: OrderDetails} for order_ids, served from the cache where possible."""
+    cache = get_order_cache(db_path)
+    details = cache.get_many(order_ids)
+    missing = [order_id for order_id in order_ids if order_id not in details]
+    if missing:
+        with reader(db_path) as con:
+            fetched = fetch_orders_details(con, missing)
+        metrics.count_rows(read=len(fetched))
+        cache.put_many(fetched)
+        details.update(fetched)
+    return details
+
+
+def get_order_details(order_id, db_path=DB_PATH):
+    """OrderDetails for one order, or None if it does not exist."""
+    return get_orders_details([order_id], db_path).get(order_id)
@@ -0,0 +1,177 @@
+"""
+Restaurant Billing Order Writer
+Group-commit queue for orders coming from many cashier sessions at once.
+
+Every Streamlit session used to commit its own order, so at lunch rush the
+tills queued up on SQLite's write lock (and on one fsync each). Here a single
+background thread owns the writes: sessions submit() a prepared order and get
+a Future back; the thread takes whatever arrived within MAX_WAIT_MS (up to
+MAX_BATCH orders) and writes it in one transaction - one commit for the lot.
+Each order runs in its own SAVEPOINT, so a bad order fails alone.
+Usage:
+    from order_writer import save_order          # same signature/return as orders.save_order
+    order_id, subtotal, tax, total = save_order("DINE_IN", "CASH", cart)
+
+    get_order_writer().stats()                   # queue depth, batch sizes, utilization
+"""
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import metrics
+from db import DB_PATH, writer
+from orders import prepare_order, remember_prepared, write_order
+
+MAX_BATCH = 64
+MAX_WAIT_MS = 3
+# How long save_order waits for its batch; a batch normally takes milliseconds.
+SAVE_TIMEOUT = 30
+
+_STOP = object()
+
+
+class OrderWriter:
+    def __init__(self, db_path=DB_PATH, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.db_path = Path(db_path).resolve()
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.busy_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name="order-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, order):
+        """Queue a PreparedOrder; the Future resolves to its order_id."""
+        future = Future()
+        with self._stats_lock:
+            self.submitted += 1
+        self._queue.put((order, future))
+        return future
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # finish this batch, stop on the next round
+                break
+            batch.append(item)
+        return batch
+
+    @metrics.timed("order_writer.write_batch")
+    def _write_batch(self, batch):
+        results, errors = [], []
+        try:
+            with writer(self.db_path) as con:
+                for order, future in batch:
+                    con.execute("SAVEPOINT order_write")
+                    try:
+                        results.append((order, future, write_order(con, order)))
+                    except Exception as exc:
+                        con.execute("ROLLBACK TO order_write")
+                        errors.append((future, exc))
+                    con.execute("RELEASE order_write")
+        except Exception as exc:
+            # BEGIN, a SAVEPOINT or the commit failed (e.g. "database is locked"
+            # while another process writes): nothing in this batch was saved.
+            failed = {future for future, _ in errors}
+            errors += [(future, exc) for _, future in batch if future not in failed]
+            results = []
+
+        for order, future, order_id in results:
+            try:
+                remember_prepared(order_id, order, self.db_path)
+            except Exception:
+                pass    # the order is committed; a cache/counter miss must not stop the writer
+            future.set_result(order_id)
+        for future, exc in errors:
+            future.set_exception(exc)
+        return len(results), len(errors)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                written, failed = self._write_batch(batch)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                written, failed = 0, len(batch)
+            with self._stats_lock:
+                self.busy_seconds += time.perf_counter() - started
+                self.written += written
+                self.failed += failed
+                self.batches += 1
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stop(self, timeout=None):
+        """Write whatever is queued, then stop the thread."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            elapsed = time.perf_counter() - self._started
+            return {
+                "queue_depth": self._queue.qsize(),
+                "submitted": self.submitted,
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "avg_batch": round(self.written / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                # share of wall time the writer thread spent writing; near 1.0 = saturated
+                "utilization": round(self.busy_seconds / elapsed, 3) if elapsed else 0.0,
+            }
+
+
+# ----------------- Shared writers -----------------
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_order_writer(db_path=DB_PATH):
+    key = Path(db_path).resolve()
+    with _writers_lock:
+        order_writer = _writers.get(key)
+        if order_writer is None:
+            order_writer = _writers[key] = OrderWriter(key)
+        return order_writer
+
+
+@metrics.timed()
+def save_order(order_mode, payment_method, items, discount=0.0, customer="", db_path=DB_PATH):
+    """Like orders.save_order, but committed through the shared group-commit writer."""
+    order = prepare_order(order_mode, payment_method, items, discount, customer)
+    order_id = get_order_writer(db_path).submit(order).result(timeout=SAVE_TIMEOUT)
+    return order_id, order.subtotal, order.tax_amount, order.total
+
+
+@atexit.register
+def stop_all():
+    with _writers_lock:
+        for order_writer in _writers.values():
+            order_writer.stop()
+        _writers.clear()
@@ -0,0 +1,308 @@
+"""
+Restaurant Billing Orders
+Order persistence shared by every step script.
+
+save_order() takes the cart DataFrame built by the UI (columns: id, item_name,
+price, gst_rate, qty), computes line and order totals with the integer-paise
+billing engine (billing_engine.py) in one vectorized pass and writes the order
+header plus all of its items with a single executemany inside one transaction. The sales rollups (rollups.py)
+and per-item counters (item_sales.py) are updated in that same transaction;
+after the commit the order goes to the recent-orders cache and the live sales
+counters (live_sales.py).
+
+save_orders_bulk() is the write path for offline POS sync and history
+migration: it loads many orders (plain dicts, see bulk_load.py) in chunked
+transactions with order ids assigned in blocks. Each order's order_ref is kept
+in bulk_order_refs, so re-running a load that failed half-way skips the orders
+it already committed.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+
+from billing_engine import batch_totals, cart_totals, to_rupees
+from business_day import business_day_of
+import metrics
+from db import DB_PATH, register_migration, writer
+from item_sales import record_items
+from live_sales import record_order as record_live, record_orders as record_live_many
+from order_details import remember_order
+from rollups import record_orders
+
+# header: the INSERT_ORDER_SQL params (in ORDER_INSERT_COLUMNS order);
+# lines: INSERT_ITEMS_SQL params minus order_id
+PreparedOrder = namedtuple("PreparedOrder", "header lines subtotal tax_amount total created_at business_day")
+
+ORDER_INSERT_COLUMNS = ("order_mode", "customer_name", "subtotal", "discount_amount", "tax_amount",
+                        "total_amount", "payment_method", "amount_paid", "change_due", "created_at",
+                        "business_day")
+
+INSERT_ORDER_SQL = """
+    INSERT INTO orders
+    (order_mode, customer_name, subtotal, discount_amount, tax_amount, total_amount,
+     payment_method, amount_paid, change_due, created_at, business_day)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_ORDER_WITH_ID_SQL = """
+    INSERT INTO orders
+    (id, order_mode, customer_name, subtotal, discount_amount, tax_amount, total_amount,
+     payment_method, amount_paid, change_due, created_at, business_day)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_ITEMS_SQL = """
+    INSERT INTO order_items
+    (order_id, menu_id, item_name, unit_price, gst_rate, quantity, line_subtotal, line_tax, line_total)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def prepare_order(order_mode, payment_method, items, discount=0.0, customer=""):
+    """Compute totals (billing_engine.py) and the rows to insert for one cart. No database access."""
+    totals = cart_totals(items, discount)
+    subtotal, tax_amount, total = to_rupees(totals.subtotal), to_rupees(totals.tax), to_rupees(totals.total)
+    discount = to_rupees(totals.discount)
+    now = datetime.now()
+    created_at = now.isoformat()
+    day = business_day_of(now)
+
+    header = (order_mode, customer, subtotal, discount, tax_amount, total,
+              payment_method, total, 0, created_at, day)
+    # .tolist() turns numpy scalars into plain Python values sqlite3 can bind
+    lines = list(zip(
+        items['id'].tolist(),
+        items['item_name'].tolist(),
+        items['price'].tolist(),
+        items['gst_rate'].tolist(),
+        items['qty'].tolist(),
+        to_rupees(totals.line_subtotal).tolist(),
+        to_rupees(totals.line_tax).tolist(),
+        to_rupees(totals.line_total).tolist(),
+    ))
+    return PreparedOrder(header, lines, subtotal, tax_amount, total, created_at, day)
+
+
+def write_order(con, order):
+    """Insert a PreparedOrder on the writer connection (caller owns the transaction)."""
+    order_id = con.execute(INSERT_ORDER_SQL, order.header).lastrowid
+    con.executemany(INSERT_ITEMS_SQL, [(order_id,) + line for line in order.lines])
+    record_orders(con, [(order.business_day, order.total)])
+    record_items(con, [(order.business_day, line[0], line[4], line[7]) for line in order.lines])
+    metrics.count_rows(written=1 + len(order.lines))
+    return order_id
+
+
+@metrics.timed()
+def save_order(order_mode, payment_method, items, discount=0.0, customer="", db_path=DB_PATH):
+    """Persist one order. Returns (order_id, subtotal, tax_amount, total)."""
+    order = prepare_order(order_mode, payment_method, items, discount, customer)
+    with writer(db_path) as con:
+        order_id = write_order(con, order)
+    remember_prepared(order_id, order, db_path)
+    return order_id, order.subtotal, order.tax_amount, order.total
+
+
+def remember_prepared(order_id, order, db_path=DB_PATH):
+    """
+    Put a committed PreparedOrder into the recent-orders cache (order_details.py)
+    and the live sales counters (live_sales.py).
+    """
+    header = dict(zip(ORDER_INSERT_COLUMNS, order.header))
+    remember_order(order_id, header, order.lines, db_path)
+    record_live(order_id, order.created_at, header["order_mode"], header["payment_method"], order.total,
+                [(line[0], line[4], line[7]) for line in order.lines], db_path)
+
+
+# ----------------- Bulk ingestion -----------------
+BULK_CHUNK_SIZE = 5000
+# Secondary indexes that are cheaper to rebuild once than to maintain row by row during a big load.
+BULK_LOAD_INDEXES = ("idx_orders_created_at", "idx_order_items_order_id")
+# AUTOINCREMENT never reuses ids, so respect sqlite_sequence as well as MAX(id).
+NEXT_ORDER_ID_SQL = """
+    SELECT MAX(COALESCE((SELECT MAX(id) FROM orders), 0),
+               COALESCE((SELECT seq FROM sqlite_sequence WHERE name='orders'), 0)) + 1
+"""
+
+
+BULK_REFS_SQL = """
+CREATE TABLE IF NOT EXISTS bulk_order_refs (
+    order_ref TEXT PRIMARY KEY,            -- the source system's id for the order
+    order_id INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+LOADED_REFS_SQL = "SELECT order_ref FROM bulk_order_refs WHERE order_ref IN (SELECT value FROM json_each(?))"
+INSERT_REFS_SQL = "INSERT INTO bulk_order_refs (order_ref, order_id) VALUES (?, ?)"
+
+
+@register_migration
+def create_bulk_refs_table(con):
+    con.execute(BULK_REFS_SQL)
+
+
+def _order_ref(order):
+    ref = order.get('order_ref')
+    return None if ref in (None, "") else str(ref)
+
+
+def _check_order(order):
+    """
+    Parsed (items, discount, created_at) of one order dict. Raises ValueError
+    naming the field, so a bad order is reported before anything is inserted.
+    """
+    try:
+        if not order['order_mode']:
+            raise ValueError("order_mode is empty")
+        items = [(item['item_name'], item.get('menu_id'), float(item['unit_price']),
+                  float(item['gst_rate']), int(item['quantity'])) for item in order['items']]
+        discount = float(order.get('discount_amount') or 0)
+        for field in ('amount_paid', 'change_due'):
+            float(order.get(field) or 0)
+        created_at = order.get('created_at') or datetime.now().isoformat()
+        datetime.fromisoformat(created_at)
+    except KeyError as exc:
+        raise ValueError(f"missing field {exc}") from exc
+    except (TypeError, ValueError) as exc:
+        raise ValueError(str(exc)) from exc
+    return items, discount, created_at
+
+
+def _bulk_rows(chunk, first_id, menu_ids, known_ids):
+    """
+    Header and item tuples for a chunk of order dicts, ids first_id, first_id + 1, ...
+    menu_ids: item_name -> menu id; known_ids: every menu id.
+    """
+    order_index, menu_id, names, price, gst_rate, qty = [], [], [], [], [], []
+    discounts, created = [], []
+    for offset, order in enumerate(chunk):
+        try:
+            items, discount, created_at = _check_order(order)
+            for name, item_menu_id, unit_price, rate, quantity in items:
+                if item_menu_id:
+                    item_menu_id = int(item_menu_id)
+                    if item_menu_id not in known_ids:
+                        raise ValueError(f"unknown menu_id {item_menu_id} for {name!r}")
+                else:
+                    item_menu_id = menu_ids.get(name)
+                    if item_menu_id is None:
+                        raise ValueError(f"unknown menu item {name!r}")
+                order_index.append(offset)
+                menu_id.append(item_menu_id)
+                names.append(name)
+                price.append(unit_price)
+                gst_rate.append(rate)
+                qty.append(quantity)
+        except ValueError as exc:
+            raise ValueError(f"Order {_order_ref(order) or first_id + offset}: {exc}") from exc
+        discounts.append(discount)
+        created.append(created_at)
+
+    totals = batch_totals(order_index, price, qty, gst_rate, discounts, len(chunk))
+    items = list(zip(
+        [first_id + i for i in order_index], menu_id, names, price, gst_rate, qty,
+        to_rupees(totals.line_subtotal).tolist(), to_rupees(totals.line_tax).tolist(),
+        to_rupees(totals.line_total).tolist(),
+    ))
+
+    headers = []
+    for offset, (order, created_at, subtotal, tax_amount, discount, total) in enumerate(zip(
+            chunk, created, to_rupees(totals.subtotal).tolist(), to_rupees(totals.tax).tolist(),
+            to_rupees(totals.discount).tolist(), to_rupees(totals.total).tolist())):
+        amount_paid = order.get('amount_paid')
+        headers.append((
+            first_id + offset, order['order_mode'], order.get('customer_name') or "",
+            subtotal, discount, tax_amount, total, order.get('payment_method'),
+            total if amount_paid in (None, "") else float(amount_paid),
+            float(order.get('change_due') or 0),
+            created_at,
+            business_day_of(created_at),
+        ))
+    return headers, items
+
+
+def _live_rows(headers, items):
+    """live_sales.record_orders() tuples for a committed bulk chunk."""
+    lines = {}
+    for item in items:
+        lines.setdefault(item[0], []).append((item[1], item[5], item[8]))
+    for h in headers:
+        yield h[0], h[10], h[1], h[7], h[6], lines.get(h[0], ())
+
+
+def _drop_indexes(con, names):
+    """Drop the named indexes and return their CREATE statements for rebuilding."""
+    placeholders = ",".join("?" * len(names))
+    ddl = [sql for (sql,) in con.execute(
+        f"SELECT sql FROM sqlite_master WHERE type='index' AND name IN ({placeholders})", names)]
+    for name in names:
+        con.execute(f"DROP INDEX IF EXISTS {name}")
+    return ddl
+
+
+@metrics.timed()
+def save_orders_bulk(orders, chunk_size=BULK_CHUNK_SIZE, drop_indexes=False, db_path=DB_PATH):
+    """
+    Insert many orders in chunked transactions.
+
+    orders: iterable of dicts with order_mode, payment_method, customer_name,
+    discount_amount, created_at (optional), order_ref (optional) and items: a
+    list of dicts with item_name, unit_price, gst_rate, quantity and optionally
+    menu_id. Items without menu_id are matched to the menu by item_name.
+
+    Orders whose order_ref was loaded before (or earlier in this input) are
+    skipped, so a load that failed part-way can simply be run again. A bad
+    order raises ValueError naming its order_ref; its chunk is not written.
+
+    Returns (orders_loaded, first_id, last_id, orders_skipped).
+    """
+    orders = iter(orders)
+    loaded, skipped, first_id, last_id = 0, 0, None, None
+
+    with writer(db_path) as con:
+        menu_ids = dict(con.execute("SELECT item_name, id FROM menu"))
+        known_ids = set(menu_ids.values())
+        index_ddl = _drop_indexes(con, BULK_LOAD_INDEXES) if drop_indexes else []
+
+    try:
+        while True:
+            chunk = list(islice(orders, chunk_size))
+            if not chunk:
+                break
+            with writer(db_path) as con:
+                refs = [_order_ref(order) for order in chunk]
+                seen = {ref for (ref,) in con.execute(LOADED_REFS_SQL, (json.dumps([r for r in refs if r]),))}
+                fresh, fresh_refs = [], []
+                for order, ref in zip(chunk, refs):
+                    if ref is not None:
+                        if ref in seen:
+                            continue
+                        seen.add(ref)
+                    fresh.append(order)
+                    fresh_refs.append(ref)
+                skipped += len(chunk) - len(fresh)
+                if not fresh:
+                    continue
+                chunk = fresh
+                # Reserve a block of ids for the whole chunk in one go.
+                (next_id,) = con.execute(NEXT_ORDER_ID_SQL).fetchone()
+                headers, items = _bulk_rows(chunk, next_id, menu_ids, known_ids)
+                con.executemany(INSERT_ORDER_WITH_ID_SQL, headers)
+                con.executemany(INSERT_ITEMS_SQL, items)
+                con.executemany(INSERT_REFS_SQL, [(ref, next_id + offset)
+                                                  for offset, ref in enumerate(fresh_refs) if ref is not None])
+                record_orders(con, ((h[-1], h[6]) for h in headers))
+                days = {h[0]: h[-1] for h in headers}
+                record_items(con, ((days[i[0]], i[1], i[5], i[8]) for i in items))
+                metrics.count_rows(written=len(headers) + len(items))
+            record_live_many(_live_rows(headers, items), db_path)
+            first_id = next_id if first_id is None else first_id
+            last_id = next_id + len(chunk) - 1
+            loaded += len(chunk)
+    finally:
+        if index_ddl:
+            with writer(db_path) as con:
+                for sql in index_ddl:
+                    con.execute(sql)
+
+    return loaded, first_id, last_id, skipped
@@ -0,0 +1,158 @@
+"""
+Restaurant Billing Multi-Outlet Reports
+Chain-wide sales summaries and top items across one database per outlet.
+
+chain_reports() takes a list of outlet databases (paths or glob patterns),
+runs the report queries of reports.py on every outlet in a process pool over
+read-only connections, and merges the partial aggregates: sales and order
+counts are summed per day/week/month, and item quantities and sales are
+summed per item name before the top-K is taken - so an item that is third at
+every outlet still wins the chain even if it tops none of them. Outlets run
+side by side, so fifty outlets take about as long as the slowest one.
+
+Results are OutletReports(daily, weekly, monthly, top_items) of Report tuples,
+one combined and one per outlet. The outlet databases must already have the
+rollup and item counter tables (open each with the app once, or run
+rollups.py / item_sales.py --rebuild on it).
+Usage:
+    python outlets.py "outlets/*.db" --start 2024-04-01 --end 2024-04-30 [--by-outlet]
+"""
+import argparse
+import glob
+import os
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import item_sales
+import reports
+from reports import Report
+
+OutletReports = namedtuple("OutletReports", "daily weekly monthly top_items")
+
+TOP_ITEMS_COLUMNS = ("item_name", "category", "total_qty", "total_sales")
+
+
+def outlet_paths(sources):
+    """Resolve database paths and glob patterns to a sorted list of distinct files."""
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    paths = set()
+    for source in sources:
+        matches = glob.glob(str(source))
+        if not matches and not glob.has_magic(str(source)):
+            raise FileNotFoundError(source)
+        paths.update(Path(match).resolve() for match in matches)
+    return sorted(paths)
+
+
+def outlet_names(paths):
+    """Display name per outlet: the file stem, or parent/stem where stems collide."""
+    stems = [path.stem for path in paths]
+    return [stem if stems.count(stem) == 1 else f"{path.parent.name}/{stem}"
+            for stem, path in zip(stems, paths)]
+
+
+def _run(con, sql, params):
+    cur = con.execute(sql, params)
+    return Report(tuple(c[0] for c in cur.description), cur.fetchall())
+
+
+def _outlet_reports(db_path, start, end, category):
+    """Worker: every report for one outlet, over a read-only connection."""
+    con = sqlite3.connect(Path(db_path).as_uri() + "?mode=ro", uri=True)
+    try:
+        # No LIMIT here (-1): an exact chain-wide top-K needs every item's totals.
+        top_sql, top_params = item_sales.top_items_query(start, end, category, -1)
+        return OutletReports(
+            _run(con, *reports.daily_sales_query(start, end)),
+            _run(con, *reports.weekly_sales_query(start, end)),
+            _run(con, *reports.monthly_sales_query(start, end)),
+            _run(con, top_sql, top_params),
+        )
+    except sqlite3.Error as e:
+        raise RuntimeError(f"{db_path}: {e}") from e
+    finally:
+        con.close()
+
+
+def _merge_sales(parts):
+    """Sum (period, total_sales, total_orders) rows from several outlets."""
+    totals = {}
+    for part in parts:
+        for key, sales, orders in part.rows:
+            total_sales, total_orders = totals.get(key, (0.0, 0))
+            totals[key] = (total_sales + sales, total_orders + orders)
+    return Report(parts[0].columns, [(key, round(sales, 2), orders)
+                                     for key, (sales, orders) in sorted(totals.items())])
+
+
+def _top_items(rows, limit):
+    """(item_name, category, total_qty, total_sales) rows, summed per item, top `limit` by quantity."""
+    totals = {}
+    for name, category, qty, sales in rows:
+        total_qty, total_sales = totals.get((name, category), (0, 0.0))
+        totals[name, category] = (total_qty + qty, total_sales + sales)
+    ranked = sorted(totals.items(), key=lambda item: (-item[1][0], item[0]))
+    return Report(TOP_ITEMS_COLUMNS, [(name, category, qty, round(sales, 2))
+                                      for (name, category), (qty, sales) in ranked[:limit]])
+
+
+def chain_reports(sources, start=None, end=None, category=None, limit=10, processes=None):
+    """
+    Reports for every outlet database in sources (paths or glob patterns).
+    start/end are inclusive business days as in reports.py.
+    Returns (combined OutletReports, {outlet name: OutletReports}).
+    """
+    paths = outlet_paths(sources)
+    if not paths:
+        raise FileNotFoundError(f"No outlet databases match {sources!r}")
+    processes = min(len(paths), processes or os.cpu_count() or 1)
+    with ProcessPoolExecutor(processes) as pool:
+        results = list(pool.map(_outlet_reports, paths, [start] * len(paths), [end] * len(paths),
+                                [category] * len(paths)))
+
+    per_outlet = {}
+    for name, result in zip(outlet_names(paths), results):
+        per_outlet[name] = result._replace(top_items=_top_items(
+            (row[1:] for row in result.top_items.rows), limit))
+    combined = OutletReports(
+        _merge_sales([r.daily for r in results]),
+        _merge_sales([r.weekly for r in results]),
+        _merge_sales([r.monthly for r in results]),
+        _top_items((row[1:] for r in results for row in r.top_items.rows), limit),
+    )
+    return combined, per_outlet
+
+
+def by_outlet(per_outlet, report):
+    """One Report with an 'outlet' column in front, from the per-outlet views of e.g. 'monthly'."""
+    first = next(iter(per_outlet.values()))
+    columns = ("outlet",) + getattr(first, report).columns
+    return Report(columns, [(name,) + row for name, result in per_outlet.items()
+                            for row in getattr(result, report).rows])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chain-wide sales reports across outlet databases.")
+    parser.add_argument("databases", nargs="+", help="outlet database paths or glob patterns")
+    parser.add_argument("--start", help="first business day, YYYY-MM-DD")
+    parser.add_argument("--end", help="last business day, YYYY-MM-DD")
+    parser.add_argument("--category")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("-j", "--processes", type=int)
+    parser.add_argument("--by-outlet", action="store_true", help="also print monthly sales per outlet")
+    args = parser.parse_args()
+
+    combined, per_outlet = chain_reports(args.databases, args.start, args.end, args.category,
+                                         args.limit, args.processes)
+    sections = [("Monthly Sales", combined.monthly), ("Top Selling Items", combined.top_items)]
+    if args.by_outlet:
+        sections.append(("Monthly Sales by Outlet", by_outlet(per_outlet, "monthly")))
+    print(f"{len(per_outlet)} outlets")
+    for title, report in sections:
+        print(f"\n{title}:")
+        print(*report.columns, sep="\t")
+        for row in report.rows:
+            print(*row, sep="\t")
@@ -0,0 +1,196 @@
+"""
+Restaurant Billing Receipts
+PDF receipt rendering, single and in bulk.
+
+The static part of a receipt (fonts, column widths, header cells, number
+formats) is worked out once at import in LAYOUT; rendering an order then only
+writes its own text. render_receipts() fetches orders and items in bulk (order_details.py) and
+renders them across a process pool, so a day's (or a year's) bills can be
+reprinted for audit or GST filing in one go.
+
+The PDF core fonts are latin-1 only, so amounts are printed as "Rs." - the
+rupee sign cannot be encoded by them.
+Usage:
+    python receipts.py 2024-04-01 2024-04-30 -o april_bills.zip
+    python receipts.py 2024-04-01 2024-04-30 -o april_bills.pdf     # one multi-page PDF
+"""
+import argparse
+import zipfile
+from multiprocessing import Pool
+from operator import itemgetter
+
+from fpdf import FPDF
+
+import archive
+import metrics
+from db import DB_PATH, reader
+from order_details import FETCH_CHUNK, ITEM_COLUMNS, fetch_orders_details
+
+RENDER_CHUNK = 200          # orders per task sent to a worker process
+# Picks the values LAYOUT.draw() prints per row out of an order_details item tuple
+receipt_row = itemgetter(*(ITEM_COLUMNS.index(c)
+                           for c in ("item_name", "quantity", "unit_price", "gst_rate", "line_total")))
+
+
+class ReceiptLayout:
+    """Everything about a receipt that does not depend on the order."""
+
+    font = "Arial"
+    title = "Restaurant Bill"
+    # (header, width, align, format for the item value)
+    columns = (
+        ("Item", 60, "", "{}"),
+        ("Qty", 20, "C", "{}"),
+        ("Price", 30, "R", "{:.2f}"),
+        ("GST%", 30, "R", "{}%"),
+        ("Total", 30, "R", "{:.2f}"),
+    )
+    totals = (
+        ("Subtotal", "subtotal"),
+        ("GST", "tax_amount"),
+        ("Discount", "discount_amount"),
+        ("Grand Total", "total_amount"),
+    )
+    info_lines = (
+        "Order ID: {id} | Date: {created_at}",
+        "Mode: {order_mode} | Payment: {payment_method}",
+        "Customer: {customer_name}",
+    )
+
+    def __init__(self):
+        self.header_cells = tuple((label, width, align) for label, width, align, _ in self.columns)
+        self.row_cells = tuple((width, align, fmt) for _, width, align, fmt in self.columns)
+        self.total_formats = tuple((f"{label}: Rs.{{:.2f}}", key) for label, key in self.totals)
+
+    def draw(self, pdf, order, items):
+        """Add one receipt page. items: (item_name, quantity, unit_price, gst_rate, line_total) rows."""
+        pdf.add_page()
+        pdf.set_font(self.font, "B", 14)
+        pdf.cell(200, 10, self.title, ln=True, align="C")
+        pdf.set_font(self.font, size=10)
+        for line in self.info_lines:
+            pdf.cell(200, 8, line.format(**order), ln=True)
+
+        pdf.set_font(self.font, "B", 10)
+        for label, width, align in self.header_cells:
+            pdf.cell(width, 8, label, 1, align=align)
+        pdf.ln()
+
+        pdf.set_font(self.font, size=10)
+        for row in items:
+            for value, (width, align, fmt) in zip(row, self.row_cells):
+                pdf.cell(width, 8, fmt.format(value), 1, align=align)
+            pdf.ln()
+
+        pdf.ln(5)
+        for fmt, key in self.total_formats:
+            pdf.cell(200, 8, fmt.format(order[key] or 0), ln=True, align="R")
+
+
+LAYOUT = ReceiptLayout()
+
+
+def _pdf_bytes(pdf):
+    out = pdf.output(dest="S")
+    # fpdf 1.x returns a latin-1 str, fpdf2 a bytearray
+    return out.encode("latin-1") if isinstance(out, str) else bytes(out)
+
+
+@metrics.timed()
+def render_receipt(order, items):
+    """One receipt as PDF bytes. order: mapping with the orders columns."""
+    pdf = FPDF()
+    LAYOUT.draw(pdf, order, items)
+    return _pdf_bytes(pdf)
+
+
+def render_receipts_document(receipts):
+    """Many (order, items) pairs as one multi-page PDF, bytes."""
+    pdf = FPDF()
+    for order, items in receipts:
+        LAYOUT.draw(pdf, order, items)
+    return _pdf_bytes(pdf)
+
+
+# ----------------- Bulk fetch -----------------
+def fetch_receipts(order_ids, db_path=DB_PATH):
+    """Yield lists of (order, items) for order_ids, FETCH_CHUNK orders per joined query."""
+    order_ids = list(order_ids)
+    with reader(db_path) as con:
+        for i in range(0, len(order_ids), FETCH_CHUNK):
+            ids = order_ids[i:i + FETCH_CHUNK]
+            details = fetch_orders_details(con, ids)
+            yield [(details[oid].order, [receipt_row(item) for item in details[oid].items])
+                   for oid in ids if oid in details]
+
+
+def order_ids_between(start, end, db_path=DB_PATH):
+    """Ids of orders created on days start..end (inclusive, 'YYYY-MM-DD'), archived months included."""
+    ids = []
+    with reader(db_path) as con:
+        # Partitions are cut by business day, which can start a day before the calendar day.
+        (first_day,) = con.execute("SELECT date(?, '-1 day')", (str(start),)).fetchone()
+        for schema in archive.iter_sources(con, first_day, end):
+            ids.extend(oid for (oid,) in con.execute(
+                f"SELECT id FROM {schema}.orders WHERE created_at >= ? AND created_at < date(?, '+1 day')",
+                (str(start), str(end))))
+    return sorted(ids)
+
+
+def _render_chunk(receipts):
+    return [(order["id"], render_receipt(order, items)) for order, items in receipts]
+
+
+def _render_chunks(order_ids, db_path):
+    for chunk in fetch_receipts(order_ids, db_path):
+        for i in range(0, len(chunk), RENDER_CHUNK):
+            yield chunk[i:i + RENDER_CHUNK]
+
+
+def render_receipts(order_ids, processes=None, db_path=DB_PATH):
+    """
+    Render receipts for order_ids across a process pool.
+    Yields (order_id, pdf_bytes) in order_ids order; unknown ids are skipped.
+    """
+    with Pool(processes) as pool:
+        for rendered in pool.imap(_render_chunk, _render_chunks(order_ids, db_path)):
+            yield from rendered
+
+
+def write_receipts_zip(order_ids, path, processes=None, db_path=DB_PATH):
+    """All receipts as bill_<id>.pdf entries of one zip archive. Returns the count written."""
+    count = 0
+    # PDFs are already compressed streams; storing them is much faster than deflating again.
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for order_id, pdf in render_receipts(order_ids, processes, db_path):
+            archive.writestr(f"bill_{order_id}.pdf", pdf)
+            count += 1
+    return count
+
+
+def write_receipts_pdf(order_ids, path, db_path=DB_PATH):
+    """
+    All receipts as one multi-page PDF. Returns the count written.
+    A single document cannot be split across processes; prefer write_receipts_zip for big batches.
+    """
+    receipts = [receipt for chunk in fetch_receipts(order_ids, db_path) for receipt in chunk]
+    with open(path, "wb") as f:
+        f.write(render_receipts_document(receipts))
+    return len(receipts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-render PDF receipts for a date range.")
+    parser.add_argument("start", help="first day, YYYY-MM-DD")
+    parser.add_argument("end", help="last day, YYYY-MM-DD")
+    parser.add_argument("-o", "--output", required=True, help=".zip (one PDF per bill) or .pdf (multi-page)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    ids = order_ids_between(args.start, args.end, args.db)
+    if args.output.lower().endswith(".pdf"):
+        written = write_receipts_pdf(ids, args.output, args.db)
+    else:
+        written = write_receipts_zip(ids, args.output, args.processes, args.db)
+    print(f"✔ {written} receipts written to {args.output}")
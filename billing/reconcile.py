@@ -0,0 +1,206 @@
+"""
+Restaurant Billing Reconciliation
+Checks that every order's header totals match its order_items.
+
+v_order_summary answers that question by joining and grouping the whole
+history on every query. Here the answer is kept per business day instead:
+    - triggers on orders/order_items mark a day dirty whenever one of its
+      orders or lines is inserted, changed or deleted (by the app or by hand)
+    - run() re-verifies only the dirty days and stores each day's aggregates
+      and a checksum in recon_days
+    - full_verify() re-checks everything, splitting the order id range across
+      worker processes, for when you do not trust the bookkeeping either
+An order is reported when (compared in paise, see billing_engine.py)
+    subtotal != SUM(line_subtotal), tax_amount != SUM(line_tax),
+    or total_amount != subtotal + tax_amount - discount_amount.
+Usage:
+    python reconcile.py                  # nightly: verify days changed since the last run
+    python reconcile.py --full -j 8      # verify everything on 8 processes
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import business_day  # noqa: F401  orders.business_day must exist before the dirty days are backfilled
+from db import DB_PATH, reader, register_migration, table_exists, writer
+
+SCHEMA_SQL = (
+    """CREATE TABLE IF NOT EXISTS recon_dirty (
+        business_day TEXT PRIMARY KEY
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS recon_days (
+        business_day TEXT PRIMARY KEY,
+        orders INTEGER NOT NULL,
+        lines INTEGER NOT NULL,
+        header_subtotal INTEGER NOT NULL,      -- paise
+        header_tax INTEGER NOT NULL,           -- paise
+        line_subtotal INTEGER NOT NULL,        -- paise
+        line_tax INTEGER NOT NULL,             -- paise
+        mismatches INTEGER NOT NULL,
+        checksum TEXT NOT NULL,
+        verified_at TEXT NOT NULL
+    ) WITHOUT ROWID""",
+    """CREATE TRIGGER IF NOT EXISTS trg_recon_orders_ins AFTER INSERT ON orders
+       BEGIN INSERT OR IGNORE INTO recon_dirty VALUES (NEW.business_day); END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_recon_orders_upd AFTER UPDATE ON orders
+       BEGIN
+           INSERT OR IGNORE INTO recon_dirty VALUES (OLD.business_day);
+           INSERT OR IGNORE INTO recon_dirty VALUES (NEW.business_day);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_recon_orders_del AFTER DELETE ON orders
+       BEGIN INSERT OR IGNORE INTO recon_dirty VALUES (OLD.business_day); END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_recon_items_ins AFTER INSERT ON order_items
+       BEGIN
+           INSERT OR IGNORE INTO recon_dirty
+           SELECT business_day FROM orders WHERE id = NEW.order_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_recon_items_upd AFTER UPDATE ON order_items
+       BEGIN
+           INSERT OR IGNORE INTO recon_dirty
+           SELECT business_day FROM orders WHERE id IN (OLD.order_id, NEW.order_id);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_recon_items_del AFTER DELETE ON order_items
+       BEGIN
+           INSERT OR IGNORE INTO recon_dirty
+           SELECT business_day FROM orders WHERE id = OLD.order_id;
+       END""",
+)
+
+
+@register_migration
+def create_recon_tables(con):
+    if not table_exists(con, "orders"):
+        return
+    first_time = not table_exists(con, "recon_days")
+    for statement in SCHEMA_SQL:
+        con.execute(statement)
+    if first_time:
+        # Nothing verified yet: every existing day starts out dirty.
+        con.execute("INSERT OR IGNORE INTO recon_dirty SELECT DISTINCT business_day FROM orders")
+
+
+# Per order: header amounts and the sums of its lines, all in paise.
+CHECK_SQL = """
+    SELECT o.id,
+           CAST(ROUND(o.subtotal * 100) AS INTEGER),
+           CAST(ROUND(o.tax_amount * 100) AS INTEGER),
+           CAST(ROUND(o.discount_amount * 100) AS INTEGER),
+           CAST(ROUND(o.total_amount * 100) AS INTEGER),
+           COALESCE(SUM(CAST(ROUND(oi.line_subtotal * 100) AS INTEGER)), 0),
+           COALESCE(SUM(CAST(ROUND(oi.line_tax * 100) AS INTEGER)), 0),
+           COUNT(oi.id)
+    FROM orders o
+    LEFT JOIN order_items oi ON oi.order_id = o.id
+    WHERE {where}
+    GROUP BY o.id
+    ORDER BY o.id
+"""
+
+
+def check_rows(rows):
+    """Aggregates, mismatching order ids and a checksum for CHECK_SQL rows."""
+    totals = {"orders": 0, "lines": 0, "header_subtotal": 0, "header_tax": 0,
+              "line_subtotal": 0, "line_tax": 0}
+    bad = []
+    digest = hashlib.sha256()
+    for row in rows:
+        order_id, subtotal, tax, discount, total, line_subtotal, line_tax, lines = row
+        totals["orders"] += 1
+        totals["lines"] += lines
+        totals["header_subtotal"] += subtotal
+        totals["header_tax"] += tax
+        totals["line_subtotal"] += line_subtotal
+        totals["line_tax"] += line_tax
+        if subtotal != line_subtotal or tax != line_tax or total != subtotal + tax - discount:
+            bad.append(order_id)
+        digest.update(repr(row).encode())
+    return totals, bad, digest.hexdigest()
+
+
+def verify_day(con, day):
+    """Verify one business day and store its result. Returns the mismatching order ids."""
+    totals, bad, checksum = check_rows(con.execute(CHECK_SQL.format(where="o.business_day = ?"), (day,)))
+    if totals["orders"] == 0:
+        con.execute("DELETE FROM recon_days WHERE business_day = ?", (day,))
+        return bad
+    con.execute("""
+        INSERT OR REPLACE INTO recon_days
+        (business_day, orders, lines, header_subtotal, header_tax, line_subtotal, line_tax,
+         mismatches, checksum, verified_at)
+        VALUES (:day, :orders, :lines, :header_subtotal, :header_tax, :line_subtotal, :line_tax,
+                :mismatches, :checksum, :verified_at)
+    """, dict(totals, day=day, mismatches=len(bad), checksum=checksum,
+              verified_at=datetime.now().isoformat(timespec="seconds")))
+    return bad
+
+
+def run(db_path=DB_PATH):
+    """Re-verify the days changed since the last run. Returns {business_day: [order ids]} for bad days."""
+    with reader(db_path) as con:
+        days = [day for (day,) in con.execute("SELECT business_day FROM recon_dirty")]
+    mismatches = {}
+    for day in days:
+        # One short transaction per day: clearing the mark and verifying see the
+        # same snapshot, so a write landing meanwhile simply marks the day again.
+        with writer(db_path) as con:
+            con.execute("DELETE FROM recon_dirty WHERE business_day IS ?", (day,))
+            bad = verify_day(con, day)
+        if bad:
+            mismatches[day] = bad
+    return mismatches
+
+
+# ----------------- Full parallel verify -----------------
+def _verify_range(db_path, low, high):
+    con = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        return check_rows(con.execute(CHECK_SQL.format(where="o.id BETWEEN ? AND ?"), (low, high)))
+    finally:
+        con.close()
+
+
+def full_verify(db_path=DB_PATH, processes=None):
+    """
+    Verify every order, the id range split across worker processes.
+    Returns (totals, mismatching order ids).
+    """
+    with reader(db_path) as con:
+        low, high = con.execute("SELECT MIN(id), MAX(id) FROM orders").fetchone()
+    if low is None:
+        return {}, []
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as pool:
+        parts = processes * 4     # a few ranges per worker evens out skew
+        step = max(1, (high - low + parts) // parts)
+        futures = [pool.submit(_verify_range, db_path, start, min(start + step - 1, high))
+                   for start in range(low, high + 1, step)]
+        totals, bad = {}, []
+        for future in futures:
+            part_totals, part_bad, _ = future.result()
+            for key, value in part_totals.items():
+                totals[key] = totals.get(key, 0) + value
+            bad += part_bad
+    return totals, bad
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check order headers against their items.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--full", action="store_true", help="verify every order, in parallel")
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.full:
+        totals, bad = full_verify(args.db, args.processes)
+        print(f"Checked {totals.get('orders', 0)} orders / {totals.get('lines', 0)} lines")
+        bad_by_day = {"all": bad} if bad else {}
+    else:
+        bad_by_day = run(args.db)
+    for day, ids in bad_by_day.items():
+        print(f"✘ {day}: {len(ids)} mismatching orders: {', '.join(map(str, ids[:20]))}"
+              f"{' ...' if len(ids) > 20 else ''}")
+    print("✔ All orders reconcile" if not bad_by_day else "✘ Mismatches found")
@@ -0,0 +1,176 @@
+"""
+Restaurant Billing Reports
+Date-range reporting API over business days.
+
+Every report takes start/end business days ('YYYY-MM-DD' or date, inclusive,
+None = open) that become plain range predicates on an indexed column:
+    - sales summaries read the rollup tables (rollups.py)
+    - top items read the per-item daily counters (item_sales.py)
+    - payment-mode and dine-in/takeaway splits read orders through
+      idx_orders_business_day, which covers them
+so "last 7 days" costs the same on one month or five years of history.
+Reports over orders also read the archived months (archive.py) that overlap
+the range, one attached partition at a time, and merge the results.
+
+Results are Report(columns, rows) tuples - no pandas needed; the Streamlit and
+CLI callers turn them into DataFrames or CSV as they like.
+Usage:
+    from reports import sales_summary, payment_mode_split
+    from business_day import last_n_days
+
+    daily, weekly, monthly = sales_summary(*last_n_days(7))
+"""
+from collections import namedtuple
+
+import archive
+import item_sales
+import metrics
+from db import DB_PATH, reader
+import rollups  # noqa: F401  registers the rollup tables
+
+Report = namedtuple("Report", "columns rows")
+
+
+def _day_range(column, start, end):
+    """WHERE clause + params for an inclusive business-day range (either side may be None)."""
+    where, params = [], []
+    if start is not None:
+        where.append(f"{column} >= ?")
+        params.append(str(start))
+    if end is not None:
+        where.append(f"{column} <= ?")
+        params.append(str(end))
+    return ("WHERE " + " AND ".join(where)) if where else "", params
+
+
+def _query(sql, params, db_path):
+    with reader(db_path) as con:
+        cur = con.execute(sql, params)
+        rows = cur.fetchall()
+    metrics.count_rows(read=len(rows))
+    return Report(tuple(c[0] for c in cur.description), rows)
+
+
+def daily_sales_query(start=None, end=None):
+    where, params = _day_range("day", start, end)
+    return f"SELECT day, sales_paise / 100.0 AS total_sales, total_orders FROM sales_daily {where} ORDER BY day", params
+
+
+def _period_sales_query(table, key, fmt, start, end):
+    if start is None and end is None:
+        return f"SELECT {key}, sales_paise / 100.0 AS total_sales, total_orders FROM {table} ORDER BY {key}", []
+    # A bounded range can cut a week/month in half, so roll the days in range up instead.
+    where, params = _day_range("day", start, end)
+    return f"""
+        SELECT strftime('{fmt}', day) AS {key}, SUM(sales_paise) / 100.0 AS total_sales,
+               SUM(total_orders) AS total_orders
+        FROM sales_daily {where}
+        GROUP BY 1 ORDER BY 1
+    """, params
+
+
+def weekly_sales_query(start=None, end=None):
+    return _period_sales_query("sales_weekly", "week", "%Y-%W", start, end)
+
+
+def monthly_sales_query(start=None, end=None):
+    return _period_sales_query("sales_monthly", "month", "%Y-%m", start, end)
+
+
+@metrics.timed()
+def daily_sales(start=None, end=None, db_path=DB_PATH):
+    return _query(*daily_sales_query(start, end), db_path)
+
+
+@metrics.timed()
+def weekly_sales(start=None, end=None, db_path=DB_PATH):
+    return _query(*weekly_sales_query(start, end), db_path)
+
+
+@metrics.timed()
+def monthly_sales(start=None, end=None, db_path=DB_PATH):
+    return _query(*monthly_sales_query(start, end), db_path)
+
+
+@metrics.timed()
+def sales_summary(start=None, end=None, db_path=DB_PATH):
+    """(daily, weekly, monthly) sales reports for the range."""
+    return (daily_sales(start, end, db_path), weekly_sales(start, end, db_path),
+            monthly_sales(start, end, db_path))
+
+
+@metrics.timed()
+def top_items(start=None, end=None, category=None, limit=10, db_path=DB_PATH):
+    sql, params = item_sales.top_items_query(start, end, category, limit)
+    return _query(sql, params, db_path)
+
+
+def _split(column, start, end, db_path):
+    where, params = _day_range("business_day", start, end)
+    merged = {}
+    with reader(db_path) as con:
+        for schema in archive.iter_sources(con, start, end):
+            for key, orders, sales in con.execute(f"""
+                SELECT {column}, COUNT(*), SUM(total_amount)
+                FROM {schema}.orders {where}
+                GROUP BY {column}
+            """, params):
+                total_orders, total_sales = merged.get(key, (0, 0.0))
+                merged[key] = (total_orders + orders, total_sales + sales)
+    metrics.count_rows(read=len(merged))
+    # Round the merged REAL sums back to paise so the result does not depend on how many partitions were read.
+    rows = sorted(((key, orders, round(sales, 2)) for key, (orders, sales) in merged.items()),
+                  key=lambda row: row[2], reverse=True)
+    return Report((column, "total_orders", "total_sales"), rows)
+
+
+@metrics.timed()
+def payment_mode_split(start=None, end=None, db_path=DB_PATH):
+    return _split("payment_method", start, end, db_path)
+
+
+@metrics.timed()
+def order_mode_split(start=None, end=None, db_path=DB_PATH):
+    """Dine-in vs takeaway."""
+    return _split("order_mode", start, end, db_path)
+
+
+def item_lines_query(start=None, end=None, schema="main"):
+    """
+    SQL + params for every sold line in the range, for streaming exports (exports.py).
+    No ORDER BY on purpose: rows come out of the business_day index range already
+    grouped by day, and a sort would have to hold the whole result first.
+    """
+    where, params = _day_range("o.business_day", start, end)
+    return f"""
+        SELECT o.id AS order_id, o.business_day, o.created_at, o.order_mode, o.payment_method,
+               oi.menu_id, oi.item_name, oi.unit_price, oi.gst_rate, oi.quantity,
+               oi.line_subtotal, oi.line_tax, oi.line_total
+        FROM {schema}.orders o
+        JOIN {schema}.order_items oi ON oi.order_id = o.id
+        {where}
+    """, params
+
+
+def item_line_chunks(con, start=None, end=None, chunk_size=10000):
+    """iter_item_lines() over an open connection (opened with uri=True, for the partitions)."""
+    columns = None
+    for schema in archive.iter_sources(con, start, end):
+        cur = con.execute(*item_lines_query(start, end, schema))
+        if columns is None:
+            columns = tuple(c[0] for c in cur.description)
+            yield columns
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+
+
+def iter_item_lines(start=None, end=None, chunk_size=10000, db_path=DB_PATH):
+    """
+    Like exports.iter_query(*item_lines_query(...)) but across the live database
+    and every archived month in range: yields the column names, then row chunks.
+    """
+    with reader(db_path) as con:
+        yield from item_line_chunks(con, start, end, chunk_size)
@@ -0,0 +1,109 @@
+"""
+Restaurant Billing Sales Rollups
+Daily, weekly and monthly sales totals kept up to date by the order write path.
+
+sales_summary() used to GROUP BY date(created_at) / strftime(...) over the whole
+orders table on every call. The rollup tables below hold one row per
+day/week/month instead; record_orders() bumps them in the same transaction as
+each order, so reading them costs O(days), not O(orders). Days are business
+days (business_day.py); weeks and months are derived from them. Sales are kept
+as INTEGER paise, so the running sums stay exact however many orders add up.
+Usage:
+    python rollups.py --rebuild    # recompute all rollups from orders (backfill, archive included)
+"""
+import argparse
+
+import business_day  # noqa: F401  orders.business_day must exist before the rollups are backfilled
+from archive import partition_rows
+from db import DB_PATH, register_migration, table_exists, writer
+
+# (table, key column, SQLite expression turning a business day into the key)
+ROLLUPS = (
+    ("sales_daily", "day", "?"),
+    ("sales_weekly", "week", "strftime('%Y-%W', ?)"),
+    ("sales_monthly", "month", "strftime('%Y-%m', ?)"),
+)
+
+ROLLUP_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    {key} TEXT PRIMARY KEY,
+    sales_paise INTEGER NOT NULL DEFAULT 0,
+    total_orders INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+
+UPSERT_SQL = """
+INSERT INTO {table} ({key}, sales_paise, total_orders) VALUES ({expr}, ?, ?)
+ON CONFLICT({key}) DO UPDATE SET
+    sales_paise = sales_paise + excluded.sales_paise,
+    total_orders = total_orders + excluded.total_orders
+"""
+
+REBUILD_SQL = """
+INSERT INTO {table} ({key}, sales_paise, total_orders)
+SELECT {expr}, SUM(CAST(round(total_amount * 100) AS INTEGER)), COUNT(*)
+FROM orders
+GROUP BY 1
+"""
+
+DAY_TOTALS_SQL = """
+SELECT business_day, SUM(CAST(round(total_amount * 100) AS INTEGER)), COUNT(*)
+FROM orders
+GROUP BY 1
+"""
+
+
+def record_orders(con, orders):
+    """
+    Add orders to the rollups. orders: iterable of (business_day, total_amount in rupees).
+    Must be called on the writer connection inside the order's transaction.
+    """
+    # Collapse to one delta per day first; week/month keys are derived from the day.
+    per_day = {}
+    for day, total in orders:
+        sales, count = per_day.get(day, (0, 0))
+        per_day[day] = (sales + round(total * 100), count + 1)
+    if not per_day:
+        return
+    params = [(day, sales, count) for day, (sales, count) in per_day.items()]
+    for table, key, expr in ROLLUPS:
+        con.executemany(UPSERT_SQL.format(table=table, key=key, expr=expr), params)
+
+
+def rebuild_rollups(con):
+    """Recompute every rollup table from orders, live and archived (archive.py)."""
+    for table, key, expr in ROLLUPS:
+        con.execute(f"DELETE FROM {table}")
+        con.execute(REBUILD_SQL.format(table=table, key=key, expr=expr.replace("?", "business_day")))
+    archived = list(partition_rows(con, DAY_TOTALS_SQL))
+    if archived:
+        for table, key, expr in ROLLUPS:
+            con.executemany(UPSERT_SQL.format(table=table, key=key, expr=expr), archived)
+
+
+@register_migration
+def create_rollup_tables(con):
+    for table, _, _ in ROLLUPS:
+        # Tables from before sales were kept in paise (a REAL total_sales column): rebuild them.
+        if "total_sales" in [row[1] for row in con.execute(f"PRAGMA table_info({table})")]:
+            con.execute(f"DROP TABLE {table}")
+    missing = [table for table, _, _ in ROLLUPS if not table_exists(con, table)]
+    for table, key, _ in ROLLUPS:
+        con.execute(ROLLUP_TABLE_SQL.format(table=table, key=key))
+    # First time on a database that already has orders: backfill.
+    if missing and table_exists(con, "orders"):
+        rebuild_rollups(con)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain sales rollup tables.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="recompute all rollups from orders (archive included)")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        with writer(args.db) as con:
+            rebuild_rollups(con)
+        print(f"✔ Rollups rebuilt in {args.db}")
+    else:
+        parser.print_help()
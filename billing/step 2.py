@@ -1,66 +1,32 @@
+import time
+
 import streamlit as st
-import sqlite3
 import pandas as pd
-from datetime import datetime
 
-DB_PATH = "restaurant_billing.db"
+import metrics
+
+from billing_engine import to_rupees
+from cart_ui import get_cart, menu_picker
+from live_sales import start_live_sales
+from menu_cache import get_menu as cached_menu, get_menu_snapshot, menu_cache_stats
+from menu_sync import sync_menu
+from order_writer import save_order
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+DB_PATH = "restaurant_billing.db"
+start_live_sales(DB_PATH)   # once per process: live dashboard counters (step 7.py)
 
 def get_menu():
-    con = get_connection()
-    df = pd.read_sql("SELECT id, item_name, category, price, gst_rate FROM menu WHERE is_active=1", con)
-    con.close()
-    return df
+    return cached_menu(DB_PATH)
 
 def upload_menu(df):
-    con = get_connection()
-    cur = con.cursor()
-    for _, row in df.iterrows():
-        cur.execute("""
-            INSERT OR REPLACE INTO menu (id, item_name, category, price, gst_rate, is_active, created_at)
-            VALUES ((SELECT id FROM menu WHERE item_name=?), ?, ?, ?, ?, 1, datetime('now'))
-        """, (row['item_name'], row['item_name'], row['category'], row['price'], row['gst_rate']))
-    con.commit()
-    con.close()
-
-def save_order(order_mode, payment_method, items, discount=0.0, customer=""):
-    con = get_connection()
-    cur = con.cursor()
-
-    subtotal = sum(row['qty'] * row['price'] for _, row in items.iterrows())
-    tax_amount = sum(row['qty'] * row['price'] * row['gst_rate']/100 for _, row in items.iterrows())
-    total = subtotal + tax_amount - discount
-
-    cur.execute("""INSERT INTO orders 
-        (order_mode, customer_name, subtotal, discount_amount, tax_amount, total_amount,
-         payment_method, amount_paid, change_due, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (order_mode, customer, subtotal, discount, tax_amount, total,
-         payment_method, total, 0, datetime.now().isoformat())
-    )
-    order_id = cur.lastrowid
-
-    for _, row in items.iterrows():
-        line_sub = row['price'] * row['qty']
-        line_tax = line_sub * row['gst_rate']/100
-        line_total = line_sub + line_tax
-        cur.execute("""INSERT INTO order_items 
-            (order_id, menu_id, item_name, unit_price, gst_rate, quantity, line_subtotal, line_tax, line_total)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (order_id, row['id'], row['item_name'], row['price'], row['gst_rate'],
-             row['qty'], line_sub, line_tax, line_total)
-        )
-    con.commit()
-    con.close()
-    return order_id
+    return sync_menu(df, db_path=DB_PATH)
 
 # ----------------- UI -----------------
+rerun_started = time.perf_counter()
 st.set_page_config(page_title="Restaurant Billing", layout="wide")
 st.title("🍴 Restaurant Billing System")
 
-menu_tabs = st.tabs(["Admin: Upload Menu", "New Order"])
+menu_tabs = st.tabs(["Admin: Upload Menu", "New Order"] + (["Admin: Metrics"] if metrics.enabled() else []))
 
 # -------- Admin Tab --------
 with menu_tabs[0]:
@@ -70,11 +36,16 @@ with menu_tabs[0]:
     if file:
         df = pd.read_csv(file)
         if set(["item_name","category","price","gst_rate"]).issubset(df.columns):
-            upload_menu(df)
-            st.success("✅ Menu uploaded successfully!")
+            changes = upload_menu(df)
+            st.success(
+                f"✅ Menu uploaded successfully! {len(changes.inserted)} new, "
+                f"{len(set(changes.updated) | set(changes.reactivated))} updated, "
+                f"{len(changes.deactivated)} deactivated, {changes.unchanged} unchanged."
+            )
             st.dataframe(get_menu())
         else:
             st.error("CSV missing required columns.")
+    st.caption(f"Menu cache: {menu_cache_stats(DB_PATH)}")
 
 # -------- Order Tab --------
 with menu_tabs[1]:
@@ -84,24 +55,17 @@ with menu_tabs[1]:
     customer = st.text_input("Customer Name (optional)")
     
   
-    menu = get_menu()
-    menu['qty'] = 0
+    cart = get_cart()
     st.write("### Menu")
-    for i, row in menu.iterrows():
-        menu.at[i, 'qty'] = st.number_input(
-            f"{row['item_name']} ({row['price']} ₹, GST {row['gst_rate']}%)",
-            0, 20, 0, key=f"item_{row['id']}"
-        )
-
-    order_items = menu[menu['qty'] > 0]
+    menu_picker(cart, get_menu_snapshot(DB_PATH), max_qty=20)
 
-    if not order_items.empty:
+    if cart:
+        order_items = cart.frame()
         st.write("### Order Summary")
         st.dataframe(order_items[['item_name','qty','price','gst_rate']])
 
-        subtotal = (order_items['qty'] * order_items['price']).sum()
-        tax = (order_items['qty'] * order_items['price'] * order_items['gst_rate']/100).sum()
-        total = subtotal + tax
+        totals = cart.totals()
+        subtotal, tax, total = to_rupees(totals.subtotal), to_rupees(totals.tax), to_rupees(totals.total)
 
         st.metric("Subtotal", f"₹{subtotal:.2f}")
         st.metric("Tax", f"₹{tax:.2f}")
@@ -110,5 +74,19 @@ with menu_tabs[1]:
         payment = st.selectbox("Payment Method", ["CASH","CARD","UPI","OTHER"])
 
         if st.button("Confirm & Save Order"):
-            oid = save_order(order_mode, payment, order_items, customer=customer)
+            oid, _, _, _ = save_order(order_mode, payment, order_items, customer=customer, db_path=DB_PATH)
+            cart.clear()
             st.success(f"✅ Order #{oid} saved successfully!")
+
+# -------- Metrics Tab (BILLING_METRICS=1) --------
+if metrics.enabled():
+    with menu_tabs[2]:
+        st.subheader("⏱ Hot-path timings")
+        st.caption("Latencies in ms (percentiles are histogram bucket bounds); this process only.")
+        st.dataframe(pd.DataFrame(metrics.snapshot()))
+        st.download_button("Download Prometheus metrics", metrics.prometheus_text(),
+                           file_name="billing_metrics.prom")
+        if st.button("Reset metrics"):
+            metrics.reset()
+
+metrics.observe("rerun.step_2", time.perf_counter() - rerun_started)
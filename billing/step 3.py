@@ -1,52 +1,23 @@
+import time
+
 import streamlit as st
-import sqlite3
-import pandas as pd
-from datetime import datetime
+
+import metrics
+from billing_engine import to_rupees
+from cart_ui import get_cart, menu_picker
+from live_sales import start_live_sales
+from menu_cache import get_menu as cached_menu, get_menu_snapshot
+from order_writer import save_order
 
 DB_PATH = "restaurant_billing.db"
+start_live_sales(DB_PATH)   # once per process: live dashboard counters (step 7.py)
 
 # ----------------- DB Helpers -----------------
-def get_connection():
-    return sqlite3.connect(DB_PATH)
-
 def get_menu():
-    con = get_connection()
-    df = pd.read_sql("SELECT id, item_name, category, price, gst_rate FROM menu WHERE is_active=1", con)
-    con.close()
-    return df
-
-def save_order(order_mode, payment_method, items, discount=0.0, customer=""):
-    con = get_connection()
-    cur = con.cursor()
-
-    subtotal = sum(row['qty'] * row['price'] for _, row in items.iterrows())
-    tax_amount = sum(row['qty'] * row['price'] * row['gst_rate']/100 for _, row in items.iterrows())
-    total = subtotal + tax_amount - discount
-
-    cur.execute("""INSERT INTO orders 
-        (order_mode, customer_name, subtotal, discount_amount, tax_amount, total_amount,
-         payment_method, amount_paid, change_due, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (order_mode, customer, subtotal, discount, tax_amount, total,
-         payment_method, total, 0, datetime.now().isoformat())
-    )
-    order_id = cur.lastrowid
-
-    for _, row in items.iterrows():
-        line_sub = row['price'] * row['qty']
-        line_tax = line_sub * row['gst_rate']/100
-        line_total = line_sub + line_tax
-        cur.execute("""INSERT INTO order_items 
-            (order_id, menu_id, item_name, unit_price, gst_rate, quantity, line_subtotal, line_tax, line_total)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (order_id, row['id'], row['item_name'], row['price'], row['gst_rate'],
-             row['qty'], line_sub, line_tax, line_total)
-        )
-    con.commit()
-    con.close()
-    return order_id
+    return cached_menu(DB_PATH)
 
 # ----------------- UI -----------------
+rerun_started = time.perf_counter()
 st.set_page_config(page_title="Restaurant Billing", layout="wide")
 st.title("Order Management")
 
@@ -54,29 +25,20 @@ st.title("Order Management")
 order_mode = st.radio("Order Type", ["DINE_IN", "TAKEAWAY"])
 customer = st.text_input("Customer Name (optional)")
 
-# Load Menu
-menu = get_menu()
-menu['qty'] = 0
+# Cart (kept in session state) + one page of the menu
+cart = get_cart()
 
 st.subheader("Select Items")
-for i, row in menu.iterrows():
-    menu.at[i, 'qty'] = st.number_input(
-        f"{row['item_name']} ({row['price']} ₹, GST {row['gst_rate']}%)",
-        0, 20, 0, key=f"item_{row['id']}"
-    )
-
-# Filter selected items
-order_items = menu[menu['qty'] > 0]
+menu_picker(cart, get_menu_snapshot(DB_PATH), max_qty=20)
 
-if not order_items.empty:
+if cart:
+    order_items = cart.frame()
     st.subheader("🛒 Order Summary")
     st.dataframe(order_items[['item_name','qty','price','gst_rate']])
 
-    subtotal = (order_items['qty'] * order_items['price']).sum()
-    tax = (order_items['qty'] * order_items['price'] * order_items['gst_rate']/100).sum()
-
     discount = st.number_input("Discount (₹)", min_value=0.0, step=10.0)
-    total = subtotal + tax - discount
+    totals = cart.totals(discount)
+    subtotal, tax, total = to_rupees(totals.subtotal), to_rupees(totals.tax), to_rupees(totals.total)
 
     st.markdown(f"""
     ### Bill Breakdown
@@ -89,5 +51,8 @@ if not order_items.empty:
     payment = st.selectbox("Payment Method", ["CASH","CARD","UPI","OTHER"])
 
     if st.button("Confirm & Save Order"):
-        oid = save_order(order_mode, payment, order_items, discount, customer)
+        oid, _, _, _ = save_order(order_mode, payment, order_items, discount, customer, db_path=DB_PATH)
+        cart.clear()
         st.success(f"Order #{oid} saved successfully! Final Total = ₹{total:.2f}")
+
+metrics.observe("rerun.step_3", time.perf_counter() - rerun_started)
@@ -1,106 +1,40 @@
+import time
+
 import streamlit as st
-import sqlite3
 import pandas as pd
-from datetime import datetime
-from fpdf import FPDF
 import io
 
+import metrics
+from billing_engine import to_rupees
+from cart_ui import get_cart, menu_picker
+from live_sales import start_live_sales
+from menu_cache import get_menu as cached_menu, get_menu_snapshot
+from order_details import ITEM_COLUMNS, get_order_details as cached_order_details
+from order_writer import save_order
+from receipts import render_receipt
+
 DB_PATH = "restaurant_billing.db"
+start_live_sales(DB_PATH)   # once per process: live dashboard counters (step 7.py)
 
 # ----------------- DB Helpers -----------------
-def get_connection():
-    return sqlite3.connect(DB_PATH)
-
 def get_menu():
-    con = get_connection()
-    df = pd.read_sql("SELECT id, item_name, category, price, gst_rate FROM menu WHERE is_active=1", con)
-    con.close()
-    return df
-
-def save_order(order_mode, payment_method, items, discount=0.0, customer=""):
-    con = get_connection()
-    cur = con.cursor()
-
-    subtotal = sum(row['qty'] * row['price'] for _, row in items.iterrows())
-    tax_amount = sum(row['qty'] * row['price'] * row['gst_rate']/100 for _, row in items.iterrows())
-    total = subtotal + tax_amount - discount
-
-    cur.execute("""INSERT INTO orders 
-        (order_mode, customer_name, subtotal, discount_amount, tax_amount, total_amount,
-         payment_method, amount_paid, change_due, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (order_mode, customer, subtotal, discount, tax_amount, total,
-         payment_method, total, 0, datetime.now().isoformat())
-    )
-    order_id = cur.lastrowid
-
-    # Insert order items
-    for _, row in items.iterrows():
-        line_sub = row['price'] * row['qty']
-        line_tax = line_sub * row['gst_rate']/100
-        line_total = line_sub + line_tax
-        cur.execute("""INSERT INTO order_items 
-            (order_id, menu_id, item_name, unit_price, gst_rate, quantity, line_subtotal, line_tax, line_total)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (order_id, row['id'], row['item_name'], row['price'], row['gst_rate'],
-             row['qty'], line_sub, line_tax, line_total)
-        )
-    con.commit()
-    con.close()
-    return order_id, subtotal, tax_amount, total
+    return cached_menu(DB_PATH)
 
+@metrics.timed("step_4.get_order_details")
 def get_order_details(order_id):
-    con = get_connection()
-    df = pd.read_sql("""
-        SELECT item_name, unit_price, quantity, gst_rate, line_subtotal, line_tax, line_total
-        FROM order_items WHERE order_id=?""", con, params=(order_id,))
-    order = pd.read_sql("SELECT * FROM orders WHERE id=?", con, params=(order_id,))
-    con.close()
-    return order.iloc[0], df
+    details = cached_order_details(order_id, DB_PATH)
+    items_df = pd.DataFrame(list(details.items), columns=ITEM_COLUMNS)
+    return pd.Series(details.order), items_df[['item_name','unit_price','quantity','gst_rate',
+                                               'line_subtotal','line_tax','line_total']]
 
 # ----------------- PDF Helper -----------------
+@metrics.timed("step_4.generate_pdf")
 def generate_pdf(order, items_df):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 14)
-    pdf.cell(200, 10, "Restaurant Bill", ln=True, align="C")
-    pdf.set_font("Arial", size=10)
-    pdf.cell(200, 8, f"Order ID: {order['id']} | Date: {order['created_at']}", ln=True)
-    pdf.cell(200, 8, f"Mode: {order['order_mode']} | Payment: {order['payment_method']}", ln=True)
-    pdf.cell(200, 8, f"Customer: {order['customer_name']}", ln=True)
-
-    # Table Header
-    pdf.set_font("Arial", "B", 10)
-    pdf.cell(60, 8, "Item", 1)
-    pdf.cell(20, 8, "Qty", 1, align="C")
-    pdf.cell(30, 8, "Price", 1, align="R")
-    pdf.cell(30, 8, "GST%", 1, align="R")
-    pdf.cell(30, 8, "Total", 1, align="R")
-    pdf.ln()
-
-    # Items
-    pdf.set_font("Arial", size=10)
-    for _, row in items_df.iterrows():
-        pdf.cell(60, 8, row['item_name'], 1)
-        pdf.cell(20, 8, str(row['quantity']), 1, align="C")
-        pdf.cell(30, 8, f"{row['unit_price']:.2f}", 1, align="R")
-        pdf.cell(30, 8, f"{row['gst_rate']}%", 1, align="R")
-        pdf.cell(30, 8, f"{row['line_total']:.2f}", 1, align="R")
-        pdf.ln()
-
-    # Totals
-    pdf.ln(5)
-    pdf.cell(200, 8, f"Subtotal: ₹{order['subtotal']:.2f}", ln=True, align="R")
-    pdf.cell(200, 8, f"GST: ₹{order['tax_amount']:.2f}", ln=True, align="R")
-    pdf.cell(200, 8, f"Discount: ₹{order['discount_amount']:.2f}", ln=True, align="R")
-    pdf.cell(200, 8, f"Grand Total: ₹{order['total_amount']:.2f}", ln=True, align="R")
-
-    pdf_output = io.BytesIO()
-    pdf.output(pdf_output, "F")
-    pdf_output.seek(0)
-    return pdf_output
+    items = items_df[['item_name','quantity','unit_price','gst_rate','line_total']].itertuples(index=False, name=None)
+    return io.BytesIO(render_receipt(order.to_dict(), items))
 
 # ----------------- UI -----------------
+rerun_started = time.perf_counter()
 st.set_page_config(page_title="Billing System", layout="wide")
 st.title("Bill Generation & Export")
 
@@ -108,23 +42,16 @@ st.title("Bill Generation & Export")
 order_mode = st.radio("Order Type", ["DINE_IN", "TAKEAWAY"])
 customer = st.text_input("Customer Name (optional)")
 
-menu = get_menu()
-menu['qty'] = 0
+cart = get_cart()
 
 st.subheader("Select Items")
-for i, row in menu.iterrows():
-    menu.at[i, 'qty'] = st.number_input(
-        f"{row['item_name']} ({row['price']} ₹, GST {row['gst_rate']}%)",
-        0, 10, 0, key=f"item_{row['id']}"
-    )
+menu_picker(cart, get_menu_snapshot(DB_PATH), max_qty=10)
 
-order_items = menu[menu['qty'] > 0]
-
-if not order_items.empty:
-    subtotal = (order_items['qty'] * order_items['price']).sum()
-    tax = (order_items['qty'] * order_items['price'] * order_items['gst_rate']/100).sum()
+if cart:
+    order_items = cart.frame()
     discount = st.number_input("Discount (₹)", min_value=0.0, step=10.0)
-    total = subtotal + tax - discount
+    totals = cart.totals(discount)
+    subtotal, tax, total = to_rupees(totals.subtotal), to_rupees(totals.tax), to_rupees(totals.total)
 
     st.write("### Bill Breakdown")
     st.write(f"Subtotal: ₹{subtotal:.2f} | GST: ₹{tax:.2f} | Discount: ₹{discount:.2f} | Total: ₹{total:.2f}")
@@ -132,7 +59,8 @@ if not order_items.empty:
     payment = st.selectbox("Payment Method", ["CASH","CARD","UPI","OTHER"])
 
     if st.button("Confirm & Generate Bill"):
-        order_id, _, _, _ = save_order(order_mode, payment, order_items, discount, customer)
+        order_id, _, _, _ = save_order(order_mode, payment, order_items, discount, customer, db_path=DB_PATH)
+        cart.clear()
         st.success(f"Order #{order_id} saved!")
 
         order, items_df = get_order_details(order_id)
@@ -154,3 +82,5 @@ if not order_items.empty:
 
         json_file = items_df.to_json(orient="records").encode("utf-8")
         st.download_button("Export Items as JSON", json_file, file_name=f"bill_{order_id}.json")
+
+metrics.observe("rerun.step_4", time.perf_counter() - rerun_started)
@@ -1,55 +1,19 @@
-import sqlite3
-from datetime import datetime
+from collections import namedtuple
 
-DB_PATH = "restaurant_billing.db"
-
-def get_connection():
-    return sqlite3.connect(DB_PATH)
-
-# Save completed order + items
-def save_order(order_mode, payment_method, items_df, discount=0.0, customer=""):
-    con = get_connection()
-    cur = con.cursor()
+from order_details import ITEM_COLUMNS, ORDER_COLUMNS, get_order_details as cached_order_details
+from orders import save_order  # save completed order + items (kept importable from here)
 
-    # ---- totals ----
-    subtotal = sum(row['qty'] * row['price'] for _, row in items_df.iterrows())
-    tax_amount = sum(row['qty'] * row['price'] * row['gst_rate']/100 for _, row in items_df.iterrows())
-    total = subtotal + tax_amount - discount
-
-    # ---- insert into orders ----
-    cur.execute("""
-        INSERT INTO orders 
-        (order_mode, customer_name, subtotal, discount_amount, tax_amount, total_amount, 
-         payment_method, amount_paid, change_due, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        order_mode, customer, subtotal, discount, tax_amount, total,
-        payment_method, total, 0, datetime.now().isoformat()
-    ))
-    order_id = cur.lastrowid
-
-    # ---- insert each item ----
-    for _, row in items_df.iterrows():
-        line_sub = row['price'] * row['qty']
-        line_tax = line_sub * row['gst_rate']/100
-        line_total = line_sub + line_tax
-        cur.execute("""
-            INSERT INTO order_items 
-            (order_id, menu_id, item_name, unit_price, gst_rate, quantity, line_subtotal, line_tax, line_total)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            order_id, row['id'], row['item_name'], row['price'], row['gst_rate'],
-            row['qty'], line_sub, line_tax, line_total
-        ))
+DB_PATH = "restaurant_billing.db"
 
-    con.commit()
-    con.close()
-    return order_id
+# Named records: read fields by name (order.total_amount, item.line_total), not by position.
+# Items carry order_id like the old order_items rows, but not the order_items row id.
+OrderRow = namedtuple("OrderRow", ORDER_COLUMNS)
+ItemRow = namedtuple("ItemRow", ("order_id",) + ITEM_COLUMNS)
 
-# Retrieve order + items later
+# Retrieve order + items later (recent orders come from the cache in order_details.py)
 def get_order_details(order_id):
-    con = get_connection()
-    order = con.execute("SELECT * FROM orders WHERE id=?", (order_id,)).fetchone()
-    items = con.execute("SELECT * FROM order_items WHERE order_id=?", (order_id,)).fetchall()
-    con.close()
-    return order, items
+    details = cached_order_details(order_id, DB_PATH)
+    if details is None:
+        return None, []
+    order = OrderRow(**details.order)
+    return order, [ItemRow(order.id, *item) for item in details.items]
@@ -1,49 +1,37 @@
-import sqlite3
 import pandas as pd
 
+import exports
+import reports
+
 DB_PATH = "restaurant_billing.db"
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+# All reports take optional start/end business days ('YYYY-MM-DD', inclusive),
+# e.g. sales_summary(*business_day.last_n_days(7)). See reports.py.
+
+def to_frame(report):
+    return pd.DataFrame(report.rows, columns=report.columns)
 
 # --- Daily, Weekly, Monthly Sales ---
-def sales_summary():
-    con = get_connection()
-    daily = pd.read_sql_query("""
-        SELECT date(created_at) as day, SUM(total_amount) as total_sales, COUNT(*) as total_orders
-        FROM orders
-        GROUP BY date(created_at)
-    """, con)
-
-    weekly = pd.read_sql_query("""
-        SELECT strftime('%Y-%W', created_at) as week, SUM(total_amount) as total_sales, COUNT(*) as total_orders
-        FROM orders
-        GROUP BY strftime('%Y-%W', created_at)
-    """, con)
-
-    monthly = pd.read_sql_query("""
-        SELECT strftime('%Y-%m', created_at) as month, SUM(total_amount) as total_sales, COUNT(*) as total_orders
-        FROM orders
-        GROUP BY strftime('%Y-%m', created_at)
-    """, con)
-
-    con.close()
-    return daily, weekly, monthly
+# Read from the rollup tables kept current by save_order (see rollups.py).
+def sales_summary(start=None, end=None):
+    daily, weekly, monthly = reports.sales_summary(start, end, DB_PATH)
+    return to_frame(daily), to_frame(weekly), to_frame(monthly)
 
 # --- Most Sold Items ---
-def most_sold_items(limit=10):
-    con = get_connection()
-    df = pd.read_sql_query(f"""
-        SELECT item_name, SUM(quantity) as total_qty, SUM(line_total) as total_sales
-        FROM order_items
-        GROUP BY item_name
-        ORDER BY total_qty DESC
-        LIMIT {limit}
-    """, con)
-    con.close()
-    return df
+# Ranked from the per-item daily counters keyed by menu_id (see item_sales.py).
+def most_sold_items(limit=10, start=None, end=None, category=None):
+    df = to_frame(reports.top_items(start, end, category, limit, DB_PATH))
+    return df[['item_name', 'total_qty', 'total_sales']]
+
+# --- Payment Mode / Dine-In vs Takeaway ---
+def payment_mode_split(start=None, end=None):
+    return to_frame(reports.payment_mode_split(start, end, DB_PATH))
+
+def order_mode_split(start=None, end=None):
+    return to_frame(reports.order_mode_split(start, end, DB_PATH))
 
 # --- Export any DataFrame as CSV ---
+# (for big, item-level exports use exports.export_query, which streams from the database)
 def export_report(df, filename="report.csv"):
     df.to_csv(filename, index=False)
     return filename
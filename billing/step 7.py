@@ -0,0 +1,55 @@
+import time
+
+import streamlit as st
+import pandas as pd
+
+from live_sales import get_live_sales
+
+DB_PATH = "restaurant_billing.db"
+
+# Everything on this page comes from the in-memory counters in live_sales.py,
+# kept current by save_order - refreshing never queries the database.
+
+def split_frame(counts, label, count_label="orders"):
+    rows = sorted(((key, n, sales) for key, (n, sales) in counts.items()), key=lambda r: r[2], reverse=True)
+    return pd.DataFrame(rows, columns=[label, count_label, "sales"])
+
+# ----------------- UI -----------------
+st.set_page_config(page_title="Live Sales", layout="wide")
+st.title("📈 Live Sales")
+
+live = get_live_sales(DB_PATH)          # started by the order screens, or here on first use
+window = st.select_slider("Recent window (minutes)", [15, 30, 60, 120], value=30)
+
+read_started = time.perf_counter()
+recent = live.summary(window)
+today = live.summary_since(live.day_start())
+per_minute = live.per_minute(60)
+per_hour = live.per_hour(since=live.day_start())
+read_us = (time.perf_counter() - read_started) * 1e6
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric(f"Orders, last {window} min", recent["orders"])
+col2.metric(f"Sales, last {window} min", f"₹{recent['sales']:.2f}")
+col3.metric("Orders today", today["orders"])
+col4.metric("Sales today", f"₹{today['sales']:.2f}")
+
+st.subheader("Orders per minute (last hour)")
+st.bar_chart(pd.DataFrame(per_minute, columns=["minute", "orders", "sales"]).set_index("minute")["orders"])
+
+st.subheader("Orders per hour (today)")
+st.bar_chart(pd.DataFrame(per_hour, columns=["hour", "orders", "sales"]).set_index("hour")["orders"])
+
+left, middle, right = st.columns(3)
+with left:
+    st.write("### Payment mode (today)")
+    st.dataframe(split_frame(today["by_payment"], "payment_method"), hide_index=True)
+with middle:
+    st.write("### Dine-in vs takeaway (today)")
+    st.dataframe(split_frame(today["by_mode"], "order_mode"), hide_index=True)
+with right:
+    st.write("### Category (today)")
+    st.dataframe(split_frame(today["by_category"], "category", "quantity"), hide_index=True)
+
+st.button("🔄 Refresh")
+st.caption(f"Read from memory in {read_us:.0f} µs.")
@@ -0,0 +1,150 @@
+"""
+Restaurant Billing Synthetic Data
+Seeded generator of realistic menus and order history, for benchmarks (benchmark.py).
+
+The database is created from init_db.py's own schema, the menu is inserted
+directly and the orders go through the bulk write path (orders.save_orders_bulk),
+so rollups, item counters and business days are exactly what the app would
+have built. The same seed always gives the same data.
+
+Orders follow a restaurant's day: lunch and dinner peaks, busier weekends,
+mostly 1-4 distinct items per bill with a few popular items taking most of
+the sales, and a DINE_IN/TAKEAWAY and payment-method mix.
+Usage:
+    python synthetic_data.py bench.db --items 120 --orders 1000000 --days 365 [--seed 42]
+"""
+import argparse
+import importlib.util
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+import pandas as pd
+
+from orders import save_orders_bulk
+
+INIT_DB_SCRIPT = Path(__file__).with_name("init_db.py(step 1).py")
+
+SEED = 42
+# GST rate -> share of menu items
+GST_MIX = {5.0: 0.75, 12.0: 0.05, 18.0: 0.20}
+# category -> (price range, share of menu items)
+CATEGORIES = {
+    "Starter": ((120, 320), 0.20),
+    "Main Course": ((140, 420), 0.30),
+    "Breads": ((25, 90), 0.10),
+    "Rice": ((120, 280), 0.10),
+    "Desserts": ((60, 180), 0.12),
+    "Beverages": ((30, 220), 0.18),
+}
+# Share of a day's orders by hour of day (lunch and dinner peaks)
+HOUR_WEIGHTS = {8: 2, 9: 3, 10: 3, 11: 5, 12: 12, 13: 14, 14: 9, 15: 4, 16: 3, 17: 4,
+                18: 6, 19: 11, 20: 14, 21: 11, 22: 6, 23: 2}
+WEEKEND_UPLIFT = 1.3
+# distinct items per bill -> weight, quantity of each item -> weight
+BASKET_SIZES = {1: 24, 2: 30, 3: 20, 4: 12, 5: 7, 6: 4, 7: 2, 8: 1}
+QUANTITIES = {1: 72, 2: 20, 3: 6, 4: 2}
+ORDER_MODES = {"DINE_IN": 62, "TAKEAWAY": 38}
+PAYMENT_METHODS = {"UPI": 46, "CASH": 28, "CARD": 23, "OTHER": 3}
+DISCOUNT_SHARE = 0.08           # bills with a discount
+ITEM_POPULARITY_SKEW = 1.1      # Zipf exponent over menu items
+
+
+def load_schema():
+    """schema_sql from init_db.py (loaded by path - the script's file name is not importable)."""
+    spec = importlib.util.spec_from_file_location("init_db", INIT_DB_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.schema_sql
+
+
+def _pick(rng, weights, k=1):
+    return rng.choices(list(weights), weights=list(weights.values()), k=k)
+
+
+def make_menu(n_items, gst_mix=GST_MIX, seed=SEED):
+    """Menu DataFrame (item_name, category, price, gst_rate) in the upload_menu CSV format."""
+    rng = random.Random(seed)
+    categories = {name: share for name, (_, share) in CATEGORIES.items()}
+    rows = []
+    for i, category in enumerate(_pick(rng, categories, n_items)):
+        low, high = CATEGORIES[category][0]
+        price = round(rng.uniform(low, high) / 5) * 5
+        rows.append((f"{category} {i + 1:04d}", category, float(price), _pick(rng, gst_mix)[0]))
+    return pd.DataFrame(rows, columns=["item_name", "category", "price", "gst_rate"])
+
+
+def _day_counts(n_orders, start, days):
+    weights = [WEEKEND_UPLIFT if (start + timedelta(d)).weekday() >= 5 else 1.0 for d in range(days)]
+    total = sum(weights)
+    counts = [int(n_orders * w / total) for w in weights]
+    counts[-1] += n_orders - sum(counts)
+    return counts
+
+
+def iter_orders(menu_rows, n_orders, start=None, days=365, seed=SEED):
+    """
+    Yield n_orders bulk-load order dicts (see bulk_load.py) over `days` days
+    ending yesterday (or starting at `start`), in time order.
+    menu_rows: (menu_id, item_name, price, gst_rate) tuples.
+    """
+    rng = random.Random(seed)
+    start = start or date.today() - timedelta(days)
+    popularity = list(accumulate(1 / (rank + 1) ** ITEM_POPULARITY_SKEW for rank in range(len(menu_rows))))
+    ranked = rng.sample(menu_rows, len(menu_rows))
+    hours, hour_weights = list(HOUR_WEIGHTS), list(HOUR_WEIGHTS.values())
+
+    for offset, count in enumerate(_day_counts(n_orders, start, days)):
+        day = datetime.combine(start + timedelta(offset), datetime.min.time())
+        times = sorted(day + timedelta(hours=hour, seconds=rng.randrange(3600))
+                       for hour in rng.choices(hours, weights=hour_weights, k=count))
+        for created_at in times:
+            basket = {}
+            for i in rng.choices(range(len(ranked)), cum_weights=popularity, k=_pick(rng, BASKET_SIZES)[0]):
+                basket[i] = _pick(rng, QUANTITIES)[0]
+            items = [{"menu_id": ranked[i][0], "item_name": ranked[i][1], "unit_price": ranked[i][2],
+                      "gst_rate": ranked[i][3], "quantity": qty} for i, qty in basket.items()]
+            yield {
+                "order_mode": _pick(rng, ORDER_MODES)[0],
+                "payment_method": _pick(rng, PAYMENT_METHODS)[0],
+                "customer_name": "",
+                "discount_amount": rng.choice((20, 50, 100)) if rng.random() < DISCOUNT_SHARE else 0,
+                "created_at": created_at.isoformat(),
+                "items": items,
+            }
+
+
+def create_database(db_path, n_items=120, n_orders=100_000, days=365, gst_mix=GST_MIX, seed=SEED):
+    """Create db_path with the init_db schema, a synthetic menu and order history. Returns the menu."""
+    if Path(db_path).exists():
+        raise FileExistsError(db_path)
+    menu = make_menu(n_items, gst_mix, seed)
+    con = sqlite3.connect(db_path)
+    try:
+        con.executescript(load_schema())
+        con.executemany("INSERT INTO menu (item_name, category, price, gst_rate) VALUES (?,?,?,?)",
+                        menu.itertuples(index=False, name=None))
+        con.commit()
+        menu_rows = con.execute("SELECT id, item_name, price, gst_rate FROM menu ORDER BY id").fetchall()
+    finally:
+        con.close()
+    save_orders_bulk(iter_orders(menu_rows, n_orders, days=days, seed=seed), drop_indexes=True, db_path=db_path)
+    return menu
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create a synthetic restaurant billing database.")
+    parser.add_argument("db")
+    parser.add_argument("--items", type=int, default=120, help="menu size")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=365, help="history length, ending yesterday")
+    parser.add_argument("--gst-mix", default="5:0.75,12:0.05,18:0.20", help="rate:share,...")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args()
+
+    gst_mix = {float(rate): float(share) for rate, share in
+               (part.split(":") for part in args.gst_mix.split(","))}
+    create_database(args.db, args.items, args.orders, args.days, gst_mix, args.seed)
+    print(f"✔ {args.orders} orders over {args.days} days, {args.items} menu items in {args.db}")